@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit_app
+
+# Headless question answering, as a library call or a local HTTP endpoint:
+#   python api.py ask faq.txt --output answers.json
+#   python api.py serve --port 8765
+#   curl -X POST localhost:8765/answer -d '{"questions": ["How do I cut a dado?"]}'
+
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "8"))
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "500"))
+
+# Shared by every batch and HTTP request in the process, so parallel callers can't
+# push the pipeline past the limit between them
+_answer_slots = threading.BoundedSemaphore(API_MAX_CONCURRENCY)
+_max_concurrency = API_MAX_CONCURRENCY
+
+
+def set_max_concurrency(limit):
+    # Call before answering starts; questions already running keep their old slots
+    global _answer_slots, _max_concurrency
+    _answer_slots = threading.BoundedSemaphore(limit)
+    _max_concurrency = limit
+
+
+def answer_result(question, single_pass=False):
+    with _answer_slots:
+        try:
+            matches, final_answer, related_products, keywords, timings = streamlit_app.answer_query(question, single_pass=single_pass)
+        except Exception as e:
+            return {"question": question, "error": f"{type(e).__name__}: {e}"}
+
+    video = streamlit_app.related_video(matches) if matches else None
+    return {
+        "question": question,
+        "answer": final_answer,
+        "products": [
+            {"id": product_id, "title": title, "tags": tags, "link": link}
+            for product_id, title, tags, link in related_products or []
+        ],
+        "video": {"title": video[0], "link": video[1]} if video else None,
+        "keywords": keywords,
+        "timings_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()},
+    }
+
+
+def answer_questions(questions, single_pass=False):
+    # Results come back in the order of `questions`; a failed question carries "error" instead of "answer"
+    questions = list(questions)
+    if not questions:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_max_concurrency, len(questions))) as executor:
+        return list(executor.map(lambda question: answer_result(question, single_pass), questions))
+
+
+class AnswerHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "products": len(streamlit_app.product_catalog)})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/answer":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "Request body must be JSON"})
+            return
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "Request body must be a JSON object"})
+            return
+
+        questions = body.get("questions")
+        if questions is None and "question" in body:
+            questions = [body["question"]]
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q.strip() for q in questions):
+            self._send_json(400, {"error": "Expected a non-empty \"questions\" list of strings"})
+            return
+        if len(questions) > API_MAX_BATCH:
+            self._send_json(413, {"error": f"At most {API_MAX_BATCH} questions per request"})
+            return
+        single_pass = body.get("single_pass", False)
+        if not isinstance(single_pass, bool):
+            self._send_json(400, {"error": "\"single_pass\" must be true or false"})
+            return
+
+        results = answer_questions(questions, single_pass=single_pass)
+        self._send_json(200, {"results": results})
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Request lines go to stderr only when the server runs with --verbose
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(host="127.0.0.1", port=8765, verbose=False):
+    server = ThreadingHTTPServer((host, port), AnswerHandler)
+    server.verbose = verbose
+    print(f"Answering on http://{host}:{port}/answer (max {_max_concurrency} concurrent questions)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def read_questions(path):
+    # A JSON list of strings, or one question per line
+    with open(path) as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        return json.loads(text)
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--concurrency", type=int, default=API_MAX_CONCURRENCY, help="Questions answered at once")
+    parser = argparse.ArgumentParser(description="Answer woodworking questions without the Streamlit UI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ask_parser = subparsers.add_parser("ask", parents=[common], help="Answer a file of questions")
+    ask_parser.add_argument("path", help="Text file with one question per line, or a JSON list")
+    ask_parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    ask_parser.add_argument("--single-pass", action="store_true")
+    serve_parser = subparsers.add_parser("serve", parents=[common], help="Run the local HTTP endpoint")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    set_max_concurrency(args.concurrency)
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.verbose)
+        return 0
+
+    results = answer_questions(read_questions(args.path), single_pass=args.single_pass)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Answered {sum('answer' in result for result in results)}/{len(results)} questions -> {args.output}")
+    else:
+        print(output)
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
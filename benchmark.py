@@ -0,0 +1,412 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from context import estimate_tokens
+from llm_client import LLMClient
+from vector_store import VECTOR_FORMATS, LocalVectorStore, VectorStore
+
+# Offline end-to-end benchmark: drives the real pipeline functions against local
+# stand-ins for OpenAI and Pinecone with injected latency and faults.
+#   python benchmark.py --questions 200 --concurrency 8 --completion-latency-ms 800
+
+WOODWORKING_TERMS = [
+    "router table", "dado stack", "track saw", "festool domino", "pocket hole", "shelf pin", "lr 32",
+    "face frame", "edge banding", "drawer slides", "dust collection", "miter saw", "sliding table saw",
+    "rubio monocoat", "spray finish", "cabinet hinge", "plywood", "walnut", "jointer", "planer",
+    "biscuit joiner", "box joint", "shaker door", "glue up", "clamps", "chisels", "japanese saw",
+]
+
+
+class InjectedFault(Exception):
+    # Looks like a 503 to the client's retry logic
+    status_code = 503
+
+
+class CallStats:
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class FaultProfile:
+    def __init__(self, latency_ms, error_rate, seed=0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self, extra_ms=0.0):
+        with self._lock:
+            jitter = self._random.uniform(0.8, 1.2)
+            fail = self._random.random() < self.error_rate
+        time.sleep((self.latency_ms + extra_ms) * jitter / 1000)
+        if fail:
+            raise InjectedFault("injected service error")
+
+
+def hashed_embedding(text, dimension=1536):
+    # Deterministic bag-of-words embedding: texts that share words land close together
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in text.lower().split():
+        bucket = zlib.crc32(word.encode("utf-8"))
+        vector[bucket % dimension] += 1.0 if bucket & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddings:
+    def __init__(self, profile, stats):
+        self.profile = profile
+        self.stats = stats
+
+    def create(self, model, input):
+        inputs = input if isinstance(input, list) else [input]
+        tokens = sum(estimate_tokens(text) for text in inputs)
+        self.stats.add("embedding_requests")
+        self.stats.add("embedding_inputs", len(inputs))
+        self.stats.add("embedding_tokens", tokens)
+        self.profile.wait()
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=hashed_embedding(text)) for i, text in enumerate(inputs)],
+            usage=SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens)
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, profile, stats):
+        self.embeddings = FakeEmbeddings(profile, stats)
+
+
+def make_chat_model(profile, stats, response_tokens, token_latency_ms):
+    # Returns a ChatOpenAI stand-in class bound to the given latency profile and counters
+
+    def respond(messages):
+        prompt = " ".join(message.content for message in messages)
+        if "keyword" in messages[0].content.lower():
+            found = [term for term in WOODWORKING_TERMS if term in prompt.lower()]
+            return ", ".join((found or WOODWORKING_TERMS[:3])[:5])
+        words = prompt.split()
+        return " ".join(words[i % len(words)] for i in range(response_tokens))
+
+    class FakeChatModel:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+
+        def __call__(self, messages):
+            return self.invoke(messages)
+
+        def invoke(self, messages):
+            content = respond(messages)
+            self._count(messages, content)
+            self.profile_wait(estimate_tokens(content))
+            return SimpleNamespace(content=content)
+
+        def stream(self, messages):
+            content = respond(messages)
+            self._count(messages, content)
+            profile.wait()
+            for word in content.split(" "):
+                time.sleep(token_latency_ms / 1000)
+                yield SimpleNamespace(content=word + " ")
+
+        def profile_wait(self, completion_tokens):
+            profile.wait(extra_ms=completion_tokens * token_latency_ms)
+
+        def _count(self, messages, content):
+            stats.add("completion_requests")
+            stats.add("prompt_tokens", sum(estimate_tokens(message.content) for message in messages))
+            stats.add("completion_tokens", estimate_tokens(content))
+
+    return FakeChatModel
+
+
+class FaultyVectorStore(VectorStore):
+    # Wraps a real store, adding per-call latency, injected errors and call counters
+    def __init__(self, inner, profile, stats, name):
+        self.inner = inner
+        self.profile = profile
+        self.stats = stats
+        self.name = name
+
+    def _call(self, operation, *args, **kwargs):
+        self.stats.add(f"{self.name}_{operation}")
+        self.profile.wait()
+        return getattr(self.inner, operation)(*args, **kwargs)
+
+    def upsert(self, vectors):
+        return self._call("upsert", vectors)
+
+    def query(self, vector, top_k, include_metadata=False, include_values=False):
+        return self._call("query", vector, top_k, include_metadata=include_metadata, include_values=include_values)
+
+    def fetch(self, ids):
+        return self._call("fetch", ids)
+
+    def delete(self, ids=None, delete_all=False):
+        return self._call("delete", ids=ids, delete_all=delete_all)
+
+    def list(self, prefix=None, limit=100):
+        self.stats.add(f"{self.name}_list")
+        self.profile.wait()
+        return self.inner.list(prefix=prefix, limit=limit)
+
+    def describe_index_stats(self):
+        return self._call("describe_index_stats")
+
+
+def synthetic_transcript(rng, title, sentences):
+    lines = [title]
+    for _ in range(sentences):
+        terms = rng.sample(WOODWORKING_TERMS, 3)
+        lines.append(f"Today we use the {terms[0]} with a {terms[1]} before the {terms[2]} step.")
+    return "\n".join(lines)
+
+
+def percentiles(values):
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50) * 1000, 1), "p95_ms": round(float(p95) * 1000, 1), "p99_ms": round(float(p99) * 1000, 1)}
+
+
+def load_app(workdir, args):
+    # Point every on-disk cache and the local vector store at a scratch directory before import
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["LOCAL_VECTOR_STORE_PATH"] = os.path.join(workdir, "vectors")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.sqlite3")
+    os.environ["KEYWORD_STATS_PATH"] = os.path.join(workdir, "keyword_stats.json")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(workdir, "transcripts_bm25.npz")
+    os.environ["COMPLETION_CACHE_PATH"] = os.path.join(workdir, "completions.sqlite3")
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["LANGCHAIN_API_KEY"] = ""
+    os.environ["KEYWORD_EXTRACTOR"] = args.keyword_extractor
+    os.environ["LOCAL_VECTOR_PRECISION"] = args.precision
+    if not args.answer_cache:
+        os.environ["ANSWER_CACHE_THRESHOLD"] = "2"
+    if not args.completion_cache:
+        os.environ["COMPLETION_CACHE_TTL_SECONDS"] = "0"
+
+    import streamlit_app
+
+    # Faults start disabled so seeding and ingest complete; run_queries turns them on
+    stats = CallStats()
+    profiles = [
+        FaultProfile(args.embedding_latency_ms, 0.0, seed=1),
+        FaultProfile(args.completion_latency_ms, 0.0, seed=2),
+        FaultProfile(args.vector_latency_ms, 0.0, seed=3),
+    ]
+    embedding_profile, completion_profile, vector_profile = profiles
+    streamlit_app.llm_client = LLMClient(
+        FakeOpenAI(embedding_profile, stats),
+        make_chat_model(completion_profile, stats, args.response_tokens, args.token_latency_ms),
+        requests_per_minute=streamlit_app.OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=streamlit_app.OPENAI_TOKENS_PER_MINUTE,
+        max_retries=args.max_retries,
+        base_delay=0.05
+    )
+    streamlit_app.transcript_index = FaultyVectorStore(streamlit_app.transcript_index, vector_profile, stats, "transcript_index")
+    streamlit_app.product_index = FaultyVectorStore(streamlit_app.product_index, vector_profile, stats, "product_index")
+    return streamlit_app, stats, profiles
+
+
+def run_ingest(app, stats, args, rng):
+    titles = list(app.YOUTUBE_LINKS)[:args.transcripts]
+    documents = [(title, synthetic_transcript(rng, title, args.sentences)) for title in titles]
+    stats.reset()
+    app.tracer.reset()
+    start = time.perf_counter()
+    summaries = app.ingest_transcripts(
+        documents,
+        load=lambda document: (document[1], app.extract_metadata_from_text(document[1])),
+        max_workers=args.concurrency
+    )
+    elapsed = time.perf_counter() - start
+    calls = stats.snapshot()
+    chunks = sum(summary["added"] + summary["changed"] + summary["unchanged"] for summary in summaries)
+    return {
+        "files": len(summaries),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(len(summaries) / elapsed, 2),
+        "chunks_per_second": round(chunks / elapsed, 1),
+        "calls": calls,
+        "upserts_per_file": round(calls.get("transcript_index_upsert", 0) / max(len(summaries), 1), 2),
+        "stages": app.tracer.stage_stats(),
+    }
+
+
+def measure_recall(app, workdir, questions, top_k=10):
+    # Top-k overlap between the configured store and an exact float32 copy of the same
+    # corpus; the copy never builds an IVF index, so it measures both quantization and ANN loss. The fake embeddings are deterministic, so the copy is rebuilt from the chunk text.
+    store = app.transcript_index.inner
+    chunk_ids = [chunk_id for page in store.list(limit=1000) for chunk_id in page]
+    records = store.fetch(chunk_ids)['vectors']
+    reference = LocalVectorStore(os.path.join(workdir, "reference"), store.dimension, ann_threshold=float("inf"))
+    reference.upsert([
+        (chunk_id, hashed_embedding(app.normalize_text(record['metadata']['text'])))
+        for chunk_id, record in records.items()
+    ])
+    overlaps = []
+    for question in questions:
+        query = hashed_embedding(app.normalize_text(question))
+        expected = {match['id'] for match in reference.query(query, top_k)['matches']}
+        found = {match['id'] for match in store.query(query, top_k)['matches']}
+        if expected:
+            overlaps.append(len(expected & found) / len(expected))
+    return round(float(np.mean(overlaps)), 4) if overlaps else None
+
+
+def run_queries(app, stats, profiles, args, rng):
+    for profile in profiles:
+        profile.error_rate = args.error_rate
+    questions = list(app.EXAMPLE_QUESTIONS)
+    while len(questions) < args.unique_questions:
+        terms = rng.sample(WOODWORKING_TERMS, 2)
+        questions.append(f"How should I use a {terms[0]} together with a {terms[1]}?")
+    workload = [questions[i % len(questions)] for i in range(args.questions)]
+
+    stats.reset()
+    app.tracer.reset()
+    latencies = []
+    first_tokens = []
+    failures = 0
+    lock = threading.Lock()
+
+    def ask(question):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                timings = {}
+                matches, final_prompt, _, _ = app.prepare_answer(question, args.single_pass, timings)
+                if matches:
+                    "".join(app.stream_final_prompt(final_prompt, timings))
+            else:
+                _, _, _, _, timings = app.answer_query(question, single_pass=args.single_pass)
+        except InjectedFault:
+            with lock:
+                failures += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+            if "first_token" in timings:
+                first_tokens.append(timings["first_token"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(ask, workload))
+    elapsed = time.perf_counter() - start
+
+    calls = stats.snapshot()
+    return {
+        "questions": len(workload),
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "queries_per_second": round(len(workload) / elapsed, 2),
+        "latency": percentiles(latencies),
+        "first_token": percentiles(first_tokens),
+        "calls": calls,
+        "completions_per_query": round(calls.get("completion_requests", 0) / len(workload), 2),
+        "embedding_requests_per_query": round(calls.get("embedding_requests", 0) / len(workload), 2),
+        "client": app.llm_client.stats(),
+        "stages": app.tracer.stage_stats(),
+    }
+
+
+def print_report(name, report):
+    print(f"\n== {name} ==")
+    for key, value in report.items():
+        if key in ("stages", "calls"):
+            continue
+        print(f"{key:>30}: {value}")
+    print("  calls:")
+    for key, value in sorted(report["calls"].items()):
+        print(f"{key:>30}: {value}")
+    print("  stages:")
+    for stage in report["stages"]:
+        print(f"{stage['stage']:>30}: n={stage['count']} p50={stage['p50_ms']}ms p95={stage['p95_ms']}ms errors={stage['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline latency benchmark with fake OpenAI and Pinecone services.")
+    parser.add_argument("--transcripts", type=int, default=40)
+    parser.add_argument("--sentences", type=int, default=300, help="Sentences per synthetic transcript")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--unique-questions", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--embedding-latency-ms", type=float, default=80)
+    parser.add_argument("--completion-latency-ms", type=float, default=600)
+    parser.add_argument("--token-latency-ms", type=float, default=0.0, help="Extra latency per completion token")
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--vector-latency-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected failure rate per service call while querying")
+    parser.add_argument("--max-retries", type=int, default=0, help="Client retries for injected errors")
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="Stream the final completion as the UI does")
+    parser.add_argument("--answer-cache", action="store_true", help="Leave the semantic answer cache enabled")
+    parser.add_argument("--completion-cache", action="store_true", help="Leave the completion cache enabled")
+    parser.add_argument("--precision", default="float16", choices=list(VECTOR_FORMATS), help="Local vector store format")
+    parser.add_argument("--min-recall", type=float, help="Fail if top-10 recall against float32 falls below this")
+    parser.add_argument("--keyword-extractor", default="local", choices=["local", "llm"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--max-completions-per-query", type=float, help="Fail if exceeded")
+    parser.add_argument("--max-upserts-per-file", type=float, help="Fail if exceeded")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="bents-benchmark-") as workdir:
+        app, stats, profiles = load_app(workdir, args)
+        for title, tags, link in [
+            (f"Product {i}", ", ".join(rng.sample(WOODWORKING_TERMS, 4)), f"https://example.com/{i}") for i in range(50)
+        ]:
+            app.add_product(title, tags.split(", "), link)
+
+        report = {"ingest": run_ingest(app, stats, args, rng), "query": run_queries(app, stats, profiles, args, rng)}
+        report["ingest"]["recall_at_10"] = measure_recall(app, workdir, list(app.EXAMPLE_QUESTIONS))
+
+    print_report("ingest", report["ingest"])
+    print_report("query", report["query"])
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if args.max_completions_per_query is not None and report["query"]["completions_per_query"] > args.max_completions_per_query:
+        print(f"FAIL: {report['query']['completions_per_query']} completions per query", file=sys.stderr)
+        failed = True
+    if args.max_upserts_per_file is not None and report["ingest"]["upserts_per_file"] > args.max_upserts_per_file:
+        print(f"FAIL: {report['ingest']['upserts_per_file']} upserts per file", file=sys.stderr)
+        failed = True
+    recall = report["ingest"]["recall_at_10"]
+    if args.min_recall is not None and recall is not None and recall < args.min_recall:
+        print(f"FAIL: top-10 recall {recall} against float32", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
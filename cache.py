@@ -0,0 +1,318 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text):
+    # Collapse whitespace so trivially different copies of the same text share a cache entry
+    return " ".join(str(text).split())
+
+
+def content_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path, max_memory_items=4096, max_disk_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @staticmethod
+    def key(model, text):
+        return content_key(model, normalize_text(text))
+
+    def get(self, model, text):
+        key = self.key(model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return vector
+
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._conn.execute("UPDATE embeddings SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._remember(key, vector)
+            self.hits_disk += 1
+            return vector
+
+    def put(self, model, text, embedding):
+        key = self.key(model, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        blob = vector.tobytes()
+        with self._lock:
+            self._remember(key, vector)
+            previous = self._conn.execute("SELECT LENGTH(vector) FROM embeddings WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self._disk_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict_disk()
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Drop least recently used rows until the on-disk tier fits its byte budget again
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                self.evictions += 1
+
+
+class CompletionCache:
+    # Outputs of deterministic (temperature 0) completions keyed by model and prompt.
+    # `namespace` fingerprints the prompt templates: rows written under another
+    # namespace are purged on open, so editing a template invalidates its entries.
+
+    def __init__(self, path, namespace="", max_memory_items=2048, max_disk_bytes=128 * 1024 * 1024,
+                 ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.namespace = namespace
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, completion TEXT NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_access ON completions(last_access)")
+        self._conn.execute(
+            "DELETE FROM completions WHERE namespace != ? OR created <= ?",
+            (namespace, time.time() - ttl_seconds)
+        )
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(CAST(completion AS BLOB))), 0) FROM completions"
+        ).fetchone()[0]
+
+    def key(self, model, system_prompt, user_message):
+        return content_key(self.namespace, model, system_prompt, user_message)
+
+    def get(self, model, system_prompt, user_message):
+        if self.ttl_seconds <= 0:
+            return None
+        key = self.key(model, system_prompt, user_message)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now - self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT completion, created FROM completions WHERE key = ? AND created > ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row)
+            self.hits_disk += 1
+            return row[0]
+
+    def put(self, model, system_prompt, user_message, completion):
+        if self.ttl_seconds <= 0:
+            return
+        key = self.key(model, system_prompt, user_message)
+        now = time.time()
+        size = len(completion.encode("utf-8"))
+        with self._lock:
+            self._remember(key, (completion, now))
+            previous = self._conn.execute(
+                "SELECT LENGTH(CAST(completion AS BLOB)) FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, namespace, completion, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, self.namespace, completion, now, now)
+            )
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self._evict_disk()
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(CAST(completion AS BLOB)) FROM completions ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._disk_bytes -= size
+                self.evictions += 1
+
+
+class SemanticAnswerCache:
+    # Answers keyed by query embedding. A lookup hits when a stored question is at
+    # least `threshold` cosine-similar, unexpired, and was answered under the same tag.
+
+    def __init__(self, dimension=1536, threshold=0.97, ttl_seconds=24 * 3600, max_entries=1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._vectors = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._created = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._filled = np.zeros(max_entries, dtype=bool)
+        self._tags = [None] * max_entries
+        self._values = [None] * max_entries
+        self._lock = threading.Lock()
+
+    def get(self, embedding, tag=None):
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            live = self._filled & (self._created > now - self.ttl_seconds)
+            if live.any():
+                scores = np.where(live, self._vectors @ query, -np.inf)
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for slot in candidates[np.argsort(-scores[candidates])]:
+                    if self._tags[slot] == tag:
+                        self._last_used[slot] = now
+                        self.hits += 1
+                        return self._values[slot]
+            self.misses += 1
+            return None
+
+    def put(self, embedding, value, tag=None):
+        now = time.time()
+        with self._lock:
+            # Reuse an empty or expired slot first, otherwise evict the least recently used entry
+            stale = ~self._filled | (self._created <= now - self.ttl_seconds)
+            slot = int(np.argmax(stale)) if stale.any() else int(np.argmin(self._last_used))
+            self._vectors[slot] = self._normalize(embedding)
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._filled[slot] = True
+            self._tags[slot] = tag
+            self._values[slot] = value
+
+    def invalidate(self):
+        with self._lock:
+            self._filled[:] = False
+            self._tags = [None] * self.max_entries
+            self._values = [None] * self.max_entries
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": int(self._filled.sum()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,153 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+from cache import content_key, normalize_text
+
+# Bulk import/export of the product catalog as CSV or JSON:
+#   python catalog.py import products.csv --dry-run
+#   python catalog.py export products.json
+
+PRODUCT_FIELDS = ["id", "title", "tags", "link"]
+
+
+def split_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return [tag.strip() for tag in tags if tag and tag.strip()]
+
+
+def tags_hash(tags):
+    # Product embeddings are computed from the tag string alone
+    return content_key(normalize_text(", ".join(split_tags(tags))).lower())
+
+
+def read_products(data, file_format):
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if file_format == "json":
+        records = json.loads(data)
+        if isinstance(records, dict):
+            records = records.get("products", [])
+    elif file_format == "csv":
+        records = list(csv.DictReader(io.StringIO(data)))
+    else:
+        raise ValueError(f"Unsupported product file format: {file_format}")
+
+    products = []
+    for line, record in enumerate(records, start=1):
+        record = {str(key).strip().lower(): value for key, value in record.items() if key}
+        title = (record.get("title") or "").strip()
+        tags = split_tags(record.get("tags") or "")
+        if not title or not tags:
+            raise ValueError(f"Row {line} needs a title and at least one tag")
+        products.append({
+            "id": (record.get("id") or "").strip() or None,
+            "title": title,
+            "tags": tags,
+            "link": (record.get("link") or "").strip(),
+        })
+    return products
+
+
+def write_products(products, file_format):
+    # products: (product_id, title, tags_text, link) tuples as returned by get_all_products
+    records = [dict(zip(PRODUCT_FIELDS, product)) for product in products]
+    if file_format == "json":
+        return json.dumps(records, indent=2)
+    if file_format == "csv":
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=PRODUCT_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+        return output.getvalue()
+    raise ValueError(f"Unsupported product file format: {file_format}")
+
+
+def plan_import(products, existing, remove_missing=False):
+    # Diffs incoming rows against the catalog. Rows match an existing product by ID,
+    # then by case-insensitive title. Returns a list of actions:
+    #   ("add" | "update" | "relabel" | "unchanged" | "remove", product_id, old_metadata, new_product)
+    # "relabel" means the title, link or tag spelling changed but the embedded tag text
+    # (compared case-insensitively) did not, so the stored embedding is reused.
+    by_id = dict(existing)
+    by_title = {metadata["title"].strip().lower(): product_id for product_id, metadata in existing}
+    actions = []
+    matched = set()
+    for product in products:
+        product_id = product["id"] if product["id"] in by_id else by_title.get(product["title"].lower())
+        if product_id is None or product_id in matched:
+            actions.append(("add", product["id"], None, product))
+            continue
+        matched.add(product_id)
+        old = by_id[product_id]
+        if tags_hash(old["tags"]) != tags_hash(product["tags"]):
+            action = "update"
+        elif (
+            old["title"] != product["title"]
+            or old.get("link", "") != product["link"]
+            or old["tags"] != ", ".join(product["tags"])
+        ):
+            action = "relabel"
+        else:
+            action = "unchanged"
+        actions.append((action, product_id, old, product))
+
+    if remove_missing:
+        for product_id, metadata in existing:
+            if product_id not in matched:
+                actions.append(("remove", product_id, metadata, None))
+    return actions
+
+
+def summarize_plan(actions):
+    counts = {"add": 0, "update": 0, "relabel": 0, "unchanged": 0, "remove": 0}
+    for action in actions:
+        counts[action[0]] += 1
+    return counts
+
+
+def file_format_for(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in ("csv", "json"):
+        raise ValueError(f"Expected a .csv or .json file, got {path}")
+    return extension
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export the product catalog.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Sync the catalog with a CSV or JSON file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--dry-run", action="store_true", help="Show the changes without applying them")
+    import_parser.add_argument("--remove-missing", action="store_true", help="Delete products that are not in the file")
+    export_parser = subparsers.add_parser("export", help="Write the catalog to a CSV or JSON file")
+    export_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    # Imported here so --help works without API credentials
+    import streamlit_app
+
+    file_format = file_format_for(args.path)
+    if args.command == "export":
+        with open(args.path, "w", newline="") as f:
+            f.write(write_products(streamlit_app.get_all_products(), file_format))
+        print(f"Exported {len(streamlit_app.product_catalog)} products to {args.path}")
+        return 0
+
+    with open(args.path, "rb") as f:
+        products = read_products(f.read(), file_format)
+    actions = streamlit_app.import_products(products, dry_run=args.dry_run, remove_missing=args.remove_missing)
+    for action, product_id, old, new in actions:
+        if action != "unchanged":
+            print(f"{action:>9} {(new or old)['title']} ({product_id or 'new'})")
+    counts = summarize_plan(actions)
+    print(("Would apply: " if args.dry_run else "Applied: ") + ", ".join(f"{count} {action}" for action, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import re
+from collections import deque
+
+from context import estimate_tokens
+
+# A segment is one sentence, or the tail of a paragraph that doesn't end in punctuation.
+# As with context.SENTENCE_BOUNDARY, a terminator only ends a sentence when whitespace or
+# the end of the text follows, so "2.5", "e.g.a" and "example.com" stay whole.
+SEGMENT_PATTERN = re.compile(r"(?:[^\n.!?]+|[.!?](?![.!?]*[\"')\]]*(?:\s|$)))*(?:[.!?]+[\"')\]]*(?=\s|$)|\n+|$)")
+
+
+def iter_segments(text):
+    # Yields (start, end, paragraph_start) spans in one left-to-right pass
+    paragraph_start = True
+    for match in SEGMENT_PATTERN.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        segment = text[start:end]
+        if segment.strip():
+            stripped_start = start + len(segment) - len(segment.lstrip())
+            stripped_end = start + len(segment.rstrip())
+            yield stripped_start, stripped_end, paragraph_start
+            paragraph_start = False
+        if "\n" in segment:
+            paragraph_start = True
+
+
+def split_long_segment(text, start, end, max_tokens):
+    # Fallback for run-on text with no sentence punctuation: break on whitespace
+    max_chars = max_tokens * 4
+    while end - start > max_chars:
+        cut = text.rfind(" ", start, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        yield start, cut
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        yield start, end
+
+
+def chunk_text(text, max_tokens=400, overlap_tokens=60):
+    # Streams (start, end) character spans of chunks built from whole sentences.
+    # A chunk closes early at a paragraph break once it is half full, and each new
+    # chunk repeats trailing sentences of the previous one up to overlap_tokens.
+    window = deque()
+    window_tokens = 0
+    fresh = False
+
+    def spans():
+        for start, end, paragraph_start in iter_segments(text):
+            pieces = list(split_long_segment(text, start, end, max_tokens))
+            for i, (piece_start, piece_end) in enumerate(pieces):
+                yield piece_start, piece_end, paragraph_start and i == 0
+
+    for start, end, paragraph_start in spans():
+        tokens = estimate_tokens(text[start:end])
+        full = window_tokens + tokens > max_tokens
+        paragraph_break = paragraph_start and window_tokens >= max_tokens // 2
+        if window and fresh and (full or paragraph_break):
+            yield window[0][0], window[-1][1]
+            fresh = False
+            # Keep the tail of the chunk as overlap for the next one
+            kept = deque()
+            kept_tokens = 0
+            while window and kept_tokens + window[-1][2] <= overlap_tokens:
+                span = window.pop()
+                kept.appendleft(span)
+                kept_tokens += span[2]
+            window, window_tokens = kept, kept_tokens
+        while window and window_tokens + tokens > max_tokens:
+            window_tokens -= window.popleft()[2]
+        window.append((start, end, tokens))
+        window_tokens += tokens
+        fresh = True
+
+    if window and fresh:
+        yield window[0][0], window[-1][1]
@@ -0,0 +1,86 @@
+import math
+import re
+from collections import Counter
+
+from lexical import index_terms
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text with OpenAI tokenizers
+    return max(1, math.ceil(len(text) / 4))
+
+
+def split_passages(text, max_tokens=80):
+    # Group consecutive sentences into passages of up to max_tokens
+    passages = []
+    current = []
+    current_tokens = 0
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            passages.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def rank_passages(query, passages):
+    # Lexical overlap with the query, weighted by how rare each term is among the candidates
+    query_terms = set(index_terms(query))
+    passage_terms = [Counter(index_terms(passage)) for passage in passages]
+    document_frequency = Counter(term for terms in passage_terms for term in terms if term in query_terms)
+    scores = []
+    for terms in passage_terms:
+        length = sum(terms.values()) or 1
+        score = sum(
+            (1 + math.log(terms[term])) * math.log(1 + len(passages) / document_frequency[term])
+            for term in query_terms if terms[term]
+        )
+        scores.append(score / math.sqrt(length))
+    return scores
+
+
+def build_context(query, matches, token_budget=1500, passage_tokens=80):
+    # matches: (title, text) pairs in retrieval order. Picks the best-scoring passages
+    # that fit the budget and lays them out in their original order under their titles.
+    candidates = []
+    seen = set()
+    for match_rank, (title, text) in enumerate(matches):
+        for position, passage in enumerate(split_passages(text, passage_tokens)):
+            # Overlapping chunks repeat sentences; keep the first copy only
+            if passage not in seen:
+                seen.add(passage)
+                candidates.append((match_rank, position, title, passage))
+    if not candidates:
+        return ""
+
+    scores = rank_passages(query, [passage for _, _, _, passage in candidates])
+    # A small prior for retrieval rank breaks ties between equally relevant passages
+    order = sorted(range(len(candidates)), key=lambda i: -(scores[i] + 0.01 / (1 + candidates[i][0])))
+
+    selected = []
+    used_tokens = 0
+    for i in order:
+        tokens = estimate_tokens(candidates[i][3])
+        if used_tokens + tokens > token_budget:
+            continue
+        selected.append(candidates[i])
+        used_tokens += tokens
+
+    sections = []
+    current_rank = None
+    for match_rank, _, title, passage in sorted(selected):
+        if match_rank != current_rank:
+            sections.append(f"Title: {title}")
+            current_rank = match_rank
+        sections.append(passage)
+    return "\n".join(sections)
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from context import estimate_tokens
+from transcripts import extract_metadata_from_text, extract_text_from_docx
+
+# Bulk-ingest a directory of DOCX transcripts without the Streamlit UI:
+#   python ingest.py path/to/transcripts --workers 8
+
+
+def find_transcripts(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def parse_transcript(path):
+    transcript_text = extract_text_from_docx(path)
+    return path, transcript_text, extract_metadata_from_text(transcript_text)
+
+
+def parse_in_processes(paths, workers, on_error):
+    # Yields parsed transcripts as they finish, keeping only a bounded number in flight.
+    # A file that can't be parsed goes to on_error(path, exception) instead.
+    paths_by_future = {}
+
+    def results(futures):
+        for future in futures:
+            path = paths_by_future.pop(future)
+            try:
+                yield future.result()
+            except Exception as e:
+                on_error(path, e)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for path in paths:
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from results(done)
+            future = executor.submit(parse_transcript, path)
+            paths_by_future[future] = path
+            in_flight.add(future)
+        yield from results(in_flight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of DOCX video transcripts.")
+    parser.add_argument("directory", help="Directory to search recursively for .docx transcripts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Processes used to parse DOCX files")
+    parser.add_argument("--embed-workers", type=int, default=None, help="Threads used to embed and upsert chunks")
+    parser.add_argument("--checkpoint", default=".cache/ingest_checkpoint.json", help="File recording finished transcripts")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and ingest every file again")
+    args = parser.parse_args(argv)
+
+    # Imported here so the parsing processes don't each set up the API clients
+    import streamlit_app
+
+    checkpoint = {} if args.restart else load_checkpoint(args.checkpoint)
+    paths = find_transcripts(args.directory)
+    remaining = [path for path in paths if checkpoint.get(os.path.abspath(path)) != file_signature(path)]
+    print(f"{len(paths)} transcripts found, {len(paths) - len(remaining)} already ingested, {len(remaining)} to go")
+    if not remaining:
+        return 0
+
+    lock = threading.Lock()
+    totals = {"files": 0, "chunks": 0, "tokens": 0, "failed": 0}
+    tokens_by_path = {}
+    start = time.perf_counter()
+
+    def load(item):
+        path, transcript_text, metadata = item
+        with lock:
+            tokens_by_path[path] = estimate_tokens(transcript_text)
+        return transcript_text, metadata
+
+    def on_error(path, error):
+        # Recorded so the failure is visible in the checkpoint; the differing entry
+        # means the file is tried again on the next run
+        message = f"{type(error).__name__}: {error}"
+        with lock:
+            checkpoint[os.path.abspath(path)] = {**file_signature(path), "failed": message}
+            save_checkpoint(args.checkpoint, checkpoint)
+            totals["failed"] += 1
+            tokens_by_path.pop(path, None)
+        print(f"Failed {path}: {message}", file=sys.stderr)
+
+    def on_result(item, summary):
+        path = item[0]
+        with lock:
+            checkpoint[os.path.abspath(path)] = file_signature(path)
+            save_checkpoint(args.checkpoint, checkpoint)
+            totals["files"] += 1
+            totals["chunks"] += summary["added"] + summary["changed"] + summary["unchanged"]
+            totals["tokens"] += tokens_by_path.pop(path, 0)
+            elapsed = time.perf_counter() - start
+            print(
+                f"[{totals['files']}/{len(remaining)}] {summary['title']}: "
+                f"+{summary['added']} ~{summary['changed']} ={summary['unchanged']} -{summary['removed']} | "
+                f"{totals['files'] / elapsed:.2f} files/s, {totals['chunks'] / elapsed:.1f} chunks/s, "
+                f"{totals['tokens'] / elapsed:.0f} tokens/s"
+            )
+
+    embed_workers = args.embed_workers or streamlit_app.INGEST_MAX_WORKERS
+    try:
+        streamlit_app.ingest_transcripts(
+            parse_in_processes(remaining, args.workers, on_error),
+            load=load,
+            max_workers=embed_workers,
+            on_result=on_result,
+            on_error=lambda item, error: on_error(item[0], error)
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to continue from the checkpoint.", file=sys.stderr)
+        return 130
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ingested {totals['files']} files, {totals['chunks']} chunks, {totals['tokens']} tokens in {elapsed:.1f}s "
+        f"({totals['files'] / elapsed:.2f} files/s, {totals['chunks'] / elapsed:.1f} chunks/s, "
+        f"{totals['tokens'] / elapsed:.0f} tokens/s)"
+    )
+    if totals["failed"]:
+        print(f"{totals['failed']} files failed; see the errors above or the checkpoint.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
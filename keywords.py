@@ -0,0 +1,191 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from shared_files import exclusive_lock, file_version
+
+STOPWORDS = set("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further get gets getting good had has have
+having he her here hers herself him himself his how i if in into is it its itself just know let like lot make
+makes making me more most my myself need needs no nor not now of off on once only or other our ours ourselves out
+over own really right same she should so some such than that the their theirs them themselves then there these
+they thing things think this those through to too under until up us use used uses using very want was way we well
+were what when where which while who whom why will with would yes you your yours yourself yourselves
+aid aids benefit benefits best better help helps ideal improve improves offer offers work works
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*|[^\sa-z0-9]")
+WORD_PATTERN = re.compile(r"[a-z0-9]")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def candidate_phrases(tokens, max_words=3):
+    # RAKE-style candidates: runs of content words broken at stopwords and punctuation
+    phrases = []
+    current = []
+    for token in tokens + ["."]:
+        # Possessives are stripped first, so "what's" is checked as the stopword "what"
+        word = token.replace("'s", "")
+        if WORD_PATTERN.match(word) and word not in STOPWORDS and not (len(word) == 1 and word.isalpha()):
+            current.append(word)
+            continue
+        for start in range(0, len(current), max_words):
+            phrases.append(tuple(current[start:start + max_words]))
+        current = []
+    return phrases
+
+
+class KeywordExtractor:
+    # Scores candidate phrases by RAKE word degree weighted with IDF from the ingested
+    # transcripts, boosting phrases that appear in the product tag vocabulary. Like
+    # BM25Index, the stats file may be shared with ingest.py: documents added since the
+    # last load or save are merged into the file on save, and refresh() reloads it.
+
+    def __init__(self, stats_path=None):
+        self.stats_path = stats_path
+        self._document_count = 0
+        self._document_frequency = Counter()
+        self._seen_documents = set()
+        self._vocabulary = set()
+        self._vocabulary_words = set()
+        self._max_phrase_words = 1
+        self._pending = []
+        self._version = None
+        self._lock = threading.Lock()
+        if stats_path and os.path.exists(stats_path):
+            self._version = file_version(stats_path)
+            self._load()
+
+    def add_phrases(self, phrases):
+        with self._lock:
+            for phrase in phrases:
+                words = tuple(token for token in tokenize(phrase) if WORD_PATTERN.match(token))
+                if words:
+                    self._vocabulary.add(words)
+                    self._max_phrase_words = max(self._max_phrase_words, len(words))
+                    self._vocabulary_words.update(word for word in words if word not in STOPWORDS)
+
+    def add_documents(self, documents):
+        # documents: iterable of (content_hash, text); a hash is only ever counted once
+        with self._lock:
+            for content_hash, text in documents:
+                if content_hash in self._seen_documents:
+                    continue
+                words = set(token for token in tokenize(text) if WORD_PATTERN.match(token))
+                self._count_document(content_hash, words)
+                self._pending.append((content_hash, words))
+
+    def refresh(self):
+        # Reloads the stats file if another process saved it; returns True when it did
+        if not self.stats_path:
+            return False
+        with self._lock:
+            version = file_version(self.stats_path)
+            if version is None or version == self._version:
+                return False
+            self._reload(version)
+        return True
+
+    def save(self):
+        if not self.stats_path:
+            return
+        with exclusive_lock(self.stats_path):
+            with self._lock:
+                version = file_version(self.stats_path)
+                if version != self._version:
+                    self._reload(version)
+                stats = {
+                    "document_count": self._document_count,
+                    "document_frequency": dict(self._document_frequency),
+                    "seen_documents": sorted(self._seen_documents),
+                }
+                self._pending = []
+            temp_path = f"{self.stats_path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(stats, f)
+            os.replace(temp_path, self.stats_path)
+            with self._lock:
+                self._version = file_version(self.stats_path)
+
+    def _load(self):
+        if not os.path.exists(self.stats_path):
+            return
+        with open(self.stats_path) as f:
+            stats = json.load(f)
+        self._document_count = stats["document_count"]
+        self._document_frequency = Counter(stats["document_frequency"])
+        self._seen_documents = set(stats["seen_documents"])
+
+    def _reload(self, version):
+        # The file's stats plus the documents this process hasn't saved yet
+        self._document_count = 0
+        self._document_frequency = Counter()
+        self._seen_documents = set()
+        self._load()
+        for content_hash, words in self._pending:
+            self._count_document(content_hash, words)
+        self._version = version
+
+    def _count_document(self, content_hash, words):
+        if content_hash in self._seen_documents:
+            return
+        self._seen_documents.add(content_hash)
+        self._document_count += 1
+        self._document_frequency.update(words)
+
+    def idf(self, word):
+        return math.log((self._document_count + 1) / (self._document_frequency.get(word, 0) + 1)) + 1
+
+    def extract(self, text, max_keywords=5):
+        tokens = tokenize(text)
+        phrases = candidate_phrases(tokens)
+        words = [token for token in tokens if WORD_PATTERN.match(token)]
+        with self._lock:
+            # Tag phrases that occur verbatim are candidates even when they span stopwords.
+            # Matching the text's n-grams against the vocabulary keeps this linear in the text.
+            ngrams = {
+                tuple(words[i:i + n])
+                for n in range(2, self._max_phrase_words + 1)
+                for i in range(len(words) - n + 1)
+            }
+            phrases.extend(ngrams & self._vocabulary)
+            # Snapshot what scoring needs so it can run without the lock
+            candidates = set(phrases)
+            in_vocabulary = {phrase for phrase in candidates if phrase in self._vocabulary}
+            vocabulary_words = {word for phrase in candidates for word in phrase if word in self._vocabulary_words}
+            idf = {word: self.idf(word) for phrase in candidates for word in phrase}
+        if not phrases:
+            return []
+
+        frequency = Counter()
+        degree = Counter()
+        for phrase in phrases:
+            for word in phrase:
+                frequency[word] += 1
+                degree[word] += len(phrase)
+
+        scores = {}
+        for phrase in candidates:
+            score = sum(degree[word] / frequency[word] * idf[word] for word in phrase)
+            if phrase in in_vocabulary:
+                score *= 2.0
+            elif any(word in vocabulary_words for word in phrase):
+                score *= 1.5
+            scores[phrase] = score
+
+        keywords = []
+        for phrase in sorted(scores, key=lambda p: (-scores[p], p)):
+            keyword = " ".join(phrase)
+            if any(keyword in chosen for chosen in keywords):
+                continue
+            keywords.append(keyword)
+            if len(keywords) == max_keywords:
+                break
+        return keywords
@@ -0,0 +1,194 @@
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from keywords import STOPWORDS, WORD_PATTERN, tokenize
+from shared_files import exclusive_lock, file_version
+
+
+def index_terms(text):
+    # Content words plus adjacent-word bigrams, so "LR 32" or "TS 55" also match as a unit
+    words = [token for token in tokenize(text) if WORD_PATTERN.match(token) and token not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
+
+
+class BM25Index:
+    # Inverted index over transcript chunks, persisted as compressed NumPy arrays. The
+    # file can be shared by several processes (the app and ingest.py): changes made
+    # since the last load or save are replayed onto whatever is on disk when saving,
+    # and refresh() picks up saves made elsewhere.
+
+    def __init__(self, path=None, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._titles = {}
+        self._total_length = 0
+        self._pending = {}
+        self._version = None
+        self._replace_on_save = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._version = file_version(path)
+            self._load()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, doc_id, title, text):
+        terms = Counter(index_terms(text))
+        with self._lock:
+            self._remove(doc_id)
+            self._insert(doc_id, title, terms)
+            self._pending[doc_id] = (title, terms)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+            self._pending[doc_id] = None
+
+    def clear(self):
+        # A full rebuild: the next save replaces the file instead of merging into it
+        with self._lock:
+            self._reset()
+            self._pending = {}
+            self._replace_on_save = True
+
+    def refresh(self):
+        # Reloads the file if another process saved it; returns True when it did
+        if not self.path:
+            return False
+        with self._lock:
+            version = file_version(self.path)
+            if version is None or version == self._version or self._replace_on_save:
+                return False
+            self._reload(version)
+        return True
+
+    def title(self, doc_id):
+        return self._titles.get(doc_id)
+
+    def search(self, query, top_k=10):
+        with self._lock:
+            document_count = len(self._doc_lengths)
+            if document_count == 0:
+                return []
+            average_length = self._total_length / document_count
+            scores = defaultdict(float)
+            for term in set(index_terms(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, count in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                    scores[doc_id] += idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+
+    def save(self):
+        if not self.path:
+            return
+        # Held across the merge and the write so two processes can't interleave them
+        with exclusive_lock(self.path):
+            with self._lock:
+                version = file_version(self.path)
+                if version != self._version and not self._replace_on_save:
+                    self._reload(version)
+                arrays = self._arrays()
+                self._pending = {}
+                self._replace_on_save = False
+            temp_path = f"{self.path}.tmp.npz"
+            np.savez_compressed(temp_path, **arrays)
+            os.replace(temp_path, self.path)
+            with self._lock:
+                self._version = file_version(self.path)
+
+    def _arrays(self):
+        doc_ids = list(self._doc_lengths)
+        doc_index = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        terms = list(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        posting_docs = []
+        posting_counts = []
+        for i, term in enumerate(terms):
+            postings = self._postings[term]
+            posting_docs.extend(doc_index[doc_id] for doc_id in postings)
+            posting_counts.extend(postings.values())
+            offsets[i + 1] = len(posting_docs)
+        return {
+            "doc_ids": np.array(doc_ids, dtype=str),
+            "titles": np.array([self._titles[doc_id] for doc_id in doc_ids], dtype=str),
+            "doc_lengths": np.array([self._doc_lengths[doc_id] for doc_id in doc_ids], dtype=np.int32),
+            "terms": np.array(terms, dtype=str),
+            "offsets": offsets,
+            "posting_docs": np.array(posting_docs, dtype=np.int32),
+            "posting_counts": np.array(posting_counts, dtype=np.uint16),
+        }
+
+    def _reload(self, version):
+        # The file's contents plus this process's unsaved changes
+        self._reset()
+        self._load()
+        for doc_id, change in self._pending.items():
+            self._remove(doc_id)
+            if change is not None:
+                self._insert(doc_id, *change)
+        self._version = version
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._titles = {}
+        self._total_length = 0
+
+    def _insert(self, doc_id, title, terms):
+        for term, count in terms.items():
+            self._postings[term][doc_id] = count
+        self._doc_terms[doc_id] = list(terms)
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._titles[doc_id] = title
+        self._total_length += self._doc_lengths[doc_id]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            doc_ids = data["doc_ids"].tolist()
+            for doc_id, title, length in zip(doc_ids, data["titles"].tolist(), data["doc_lengths"].tolist()):
+                self._titles[doc_id] = title
+                self._doc_lengths[doc_id] = length
+                self._doc_terms[doc_id] = []
+                self._total_length += length
+            offsets = data["offsets"]
+            posting_docs = data["posting_docs"]
+            posting_counts = data["posting_counts"].tolist()
+            for i, term in enumerate(data["terms"].tolist()):
+                for position in range(offsets[i], offsets[i + 1]):
+                    doc_id = doc_ids[posting_docs[position]]
+                    self._postings[term][doc_id] = posting_counts[position]
+                    self._doc_terms[doc_id].append(term)
+
+    def _remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        self._titles.pop(doc_id, None)
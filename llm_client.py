@@ -0,0 +1,185 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from context import estimate_tokens
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self._available = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        # Blocks until `amount` is available and returns the time spent waiting
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._available >= amount:
+                    self._available -= amount
+                    return waited
+                delay = (amount - self._available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self):
+        # After a 429 the provider's window is full; stop everyone else from piling on
+        with self._lock:
+            self._available = 0
+            self._updated = time.monotonic()
+
+
+def is_retryable(error):
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # Connection resets and timeouts carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout", "ConnectionError")
+
+
+def retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    # One shared entry point for OpenAI traffic. Each model gets request and token buckets
+    # sized to the account limits, failed calls retry with jittered exponential backoff,
+    # and identical calls already in flight share a single upstream request.
+
+    def __init__(self, openai_client, chat_factory, requests_per_minute=500, tokens_per_minute=200000,
+                 max_retries=5, base_delay=0.5, max_delay=20.0, completion_token_estimate=500):
+        self.openai_client = openai_client
+        self.chat_factory = chat_factory
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.completion_token_estimate = completion_token_estimate
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.throttled_seconds = 0.0
+        self._buckets = {}
+        self._chats = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, model):
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = (TokenBucket(self.requests_per_minute), TokenBucket(self.tokens_per_minute))
+            return self._buckets[model]
+
+    def _chat(self, model, streaming):
+        # Chat models are reused; our own retry loop replaces the library's
+        with self._lock:
+            key = (model, streaming)
+            if key not in self._chats:
+                self._chats[key] = self.chat_factory(model_name=model, temperature=0, streaming=streaming, max_retries=0)
+            return self._chats[key]
+
+    def _call(self, model, tokens, func):
+        request_bucket, token_bucket = self._limits(model)
+        attempt = 0
+        while True:
+            waited = request_bucket.acquire() + token_bucket.acquire(tokens)
+            with self._lock:
+                self.requests += 1
+                self.throttled_seconds += waited
+            try:
+                return func()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                if getattr(e, "status_code", None) == 429:
+                    request_bucket.drain()
+                delay = retry_after(e) or random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+    def _coalesce(self, key, func):
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def embed(self, model, texts):
+        texts = list(texts)
+        tokens = sum(estimate_tokens(text) for text in texts)
+        return self._coalesce(
+            ("embed", model, tuple(texts)),
+            lambda: self._call(model, tokens, lambda: self.openai_client.embeddings.create(model=model, input=texts))
+        )
+
+    def complete(self, model, messages):
+        tokens = sum(estimate_tokens(message.content) for message in messages) + self.completion_token_estimate
+        key = ("complete", model, tuple((message.type, message.content) for message in messages))
+        return self._coalesce(
+            key,
+            lambda: self._call(model, tokens, lambda: self._chat(model, streaming=False).invoke(messages).content)
+        )
+
+    def stream(self, model, messages):
+        # Streams are not shared between callers; a failure is only retried before the first chunk
+        tokens = sum(estimate_tokens(message.content) for message in messages) + self.completion_token_estimate
+        chat = self._chat(model, streaming=True)
+        chunks = self._call(model, tokens, lambda: self._first_chunk(chat.stream(messages)))
+        for chunk in chunks:
+            if chunk.content:
+                yield chunk.content
+
+    @staticmethod
+    def _first_chunk(stream):
+        # Pulls the first chunk eagerly so connection errors surface inside the retry loop
+        first = next(stream, None)
+
+        def chunks():
+            if first is not None:
+                yield first
+            yield from stream
+        return chunks()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "throttled_seconds": round(self.throttled_seconds, 2),
+            }
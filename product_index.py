@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+
+
+class ProductIndex:
+    # In-memory mirror of the product index: one row of unit-normalized float32
+    # embeddings per product plus its metadata, so listing and cosine top-k are local.
+
+    def __init__(self, dimension=1536):
+        self.dimension = dimension
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._size = 0
+        self._ids = []
+        self._metadata = []
+        self._rows = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def load(self, index, page_size=100):
+        # Page through the IDs and fetch vectors in matching batches instead of a full-scan query
+        product_ids = [product_id for page in index.list(limit=page_size) for product_id in page]
+        records = []
+        for start in range(0, len(product_ids), page_size):
+            fetch_response = index.fetch(ids=product_ids[start:start + page_size])
+            for product_id, vector in fetch_response['vectors'].items():
+                records.append((product_id, vector['values'], vector['metadata'] or {}))
+
+        with self._lock:
+            self._vectors = np.zeros((max(len(records), 16), self.dimension), dtype=np.float32)
+            self._size = 0
+            self._ids = []
+            self._metadata = []
+            self._rows = {}
+            for product_id, values, metadata in records:
+                self._append(product_id, values, metadata)
+        return len(records)
+
+    def upsert(self, product_id, embedding, metadata):
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is None:
+                self._append(product_id, embedding, metadata)
+            else:
+                self._vectors[row] = self._normalize(embedding)
+                self._metadata[row] = dict(metadata)
+
+    def delete(self, product_id):
+        with self._lock:
+            row = self._rows.pop(product_id, None)
+            if row is None:
+                return
+            # Move the last row into the hole so the matrix stays contiguous
+            last = self._size - 1
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._metadata[row] = self._metadata[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._metadata.pop()
+            self._size -= 1
+
+    def get(self, product_id):
+        with self._lock:
+            row = self._rows.get(product_id)
+            return None if row is None else dict(self._metadata[row])
+
+    def vector(self, product_id):
+        # Stored unit-normalized, which is equivalent under the index's cosine metric
+        with self._lock:
+            row = self._rows.get(product_id)
+            return None if row is None else self._vectors[row].copy()
+
+    def products(self):
+        with self._lock:
+            return [(product_id, dict(metadata)) for product_id, metadata in zip(self._ids, self._metadata)]
+
+    def query(self, embedding, top_k=5):
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._vectors[:self._size] @ self._normalize(embedding)
+            top_k = min(top_k, self._size)
+            rows = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows = rows[np.argsort(-scores[rows])]
+            return [(self._ids[row], float(scores[row]), dict(self._metadata[row])) for row in rows]
+
+    def _append(self, product_id, embedding, metadata):
+        if self._size == len(self._vectors):
+            grown = np.zeros((max(16, 2 * len(self._vectors)), self.dimension), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size] = self._normalize(embedding)
+        self._ids.append(product_id)
+        self._metadata.append(dict(metadata))
+        self._rows[product_id] = self._size
+        self._size += 1
+
+    def _normalize(self, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,25 @@
+import fcntl
+import os
+from contextlib import contextmanager
+
+# Helpers for cache files that the app and the command-line tools share on disk
+
+
+def file_version(path):
+    # Changes whenever another process replaces the file; None if it doesn't exist
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def exclusive_lock(path):
+    # Blocks until no other process holds the lock on path; released on exit
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
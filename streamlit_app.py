@@ -6,13 +6,29 @@ from openai import OpenAI
 import uuid
 import random
 import pandas as pd
-from docx import Document
 from langchain.chat_models import ChatOpenAI
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.callbacks import get_openai_callback
-from langsmith import trace, Client
-import functools
+from langsmith import Client
+from datetime import datetime, timezone
+import io
+import asyncio
+import time
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+from cache import CompletionCache, EmbeddingCache, SemanticAnswerCache, content_key, normalize_text
+from catalog import plan_import, read_products, split_tags, summarize_plan, write_products
+from chunking import chunk_text
+from context import build_context
+from keywords import KeywordExtractor
+from lexical import BM25Index, reciprocal_rank_fusion
+from llm_client import LLMClient
+from product_index import ProductIndex
+from tracing import Tracer
+from transcripts import extract_metadata_from_text, extract_text_from_docx
+from vector_store import LocalVectorStore, PineconeVectorStore
 
 # Load environment variables
 load_dotenv()
@@ -22,33 +38,195 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
 
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
+# LangChain's own per-call tracing is opt-in; spans are exported by the tracer below instead
+os.environ["LANGCHAIN_TRACING_V2"] = os.getenv("LANGCHAIN_TRACING_V2", "false")
 os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 os.environ["LANGCHAIN_API_KEY"] = LANGCHAIN_API_KEY
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 os.environ["LANGCHAIN_PROJECT"] = "Bents-Woodworking-Assistant"
 
-# Initialize clients
-pc = Pinecone(api_key=PINECONE_API_KEY)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-langsmith_client = Client(api_key=LANGCHAIN_API_KEY)
+# Vector store backend: "pinecone" or "local" (memory-mapped files on this machine). A local
+# store can only be open in one process, so stop the app before running ingest.py, catalog.py
+# or api.py against the same LOCAL_VECTOR_STORE_PATH.
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", ".vectors")
+LOCAL_ANN_THRESHOLD = int(os.getenv("LOCAL_ANN_THRESHOLD", "50000"))
+# "float32", "float16" (half the size, near-identical ranking) or "int8" (a quarter, top-10 recall ~0.97)
+LOCAL_VECTOR_PRECISION = os.getenv("LOCAL_VECTOR_PRECISION", "float16")
+EMBEDDING_DIMENSION = 1536  # OpenAI embeddings dimension
 
-# Pinecone index names
+# Clients are built once per process, not on every rerun
+@st.cache_resource
+def get_pinecone_client():
+    return Pinecone(api_key=PINECONE_API_KEY)
+
+@st.cache_resource
+def get_openai_client():
+    # LLMClient owns retries so every attempt passes through its rate limiter
+    return OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+@st.cache_resource
+def get_langsmith_client():
+    return Client(api_key=LANGCHAIN_API_KEY)
+
+# Shared OpenAI rate limits (per model), sized to the account's tier
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+@st.cache_resource
+def get_llm_client():
+    # One limiter for every session in this process, so concurrent users share the quota
+    return LLMClient(
+        get_openai_client(),
+        ChatOpenAI,
+        requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+        max_retries=OPENAI_MAX_RETRIES
+    )
+
+llm_client = get_llm_client()
+
+# Tracing: spans go to an in-process ring buffer and are exported to LangSmith in the background
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "5000"))
+TRACE_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", "5"))
+
+def export_spans_to_langsmith(spans):
+    for span in spans:
+        get_langsmith_client().create_run(
+            id=span.id,
+            name=span.name,
+            run_type=span.run_type,
+            inputs={},
+            outputs={},
+            error=span.error,
+            start_time=datetime.fromtimestamp(span.start_time, timezone.utc),
+            end_time=datetime.fromtimestamp(span.start_time + span.duration, timezone.utc),
+            project_name=os.environ["LANGCHAIN_PROJECT"],
+            extra={"metadata": {"trace_id": str(span.trace_id), "parent_id": str(span.parent_id or "")}}
+        )
+
+@st.cache_resource
+def get_tracer():
+    return Tracer(
+        capacity=TRACE_BUFFER_SIZE,
+        sample_rate=TRACE_SAMPLE_RATE,
+        exporter=export_spans_to_langsmith if LANGCHAIN_API_KEY else None,
+        export_interval=TRACE_EXPORT_INTERVAL_SECONDS
+    )
+
+tracer = get_tracer()
+
+# Embedding model and local cache settings
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ITEMS = int(os.getenv("EMBEDDING_CACHE_MAX_ITEMS", "4096"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+# Ingestion batching and concurrency
+EMBEDDING_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 100
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "4"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+FETCH_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+# Answer pipeline: "single pass" merges the answer and refinement completions into one call
+CHAT_MODEL = "gpt-4o-mini"
+SINGLE_PASS_ANSWERS = os.getenv("SINGLE_PASS_ANSWERS", "false").lower() == "true"
+
+# Keyword extraction: "local" (TF-IDF/RAKE over the catalog and transcripts, LLM fallback) or "llm"
+KEYWORD_EXTRACTOR = os.getenv("KEYWORD_EXTRACTOR", "local")
+KEYWORD_STATS_PATH = os.getenv("KEYWORD_STATS_PATH", ".cache/keyword_stats.json")
+
+# Hybrid transcript retrieval: BM25 and vector results fused with reciprocal rank fusion
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".cache/transcripts_bm25.npz")
+RETRIEVAL_TOP_K = 5
+RETRIEVAL_CANDIDATES = 10
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "2.0"))
+# The answer cache only waits briefly: a repeat question's embedding comes straight from the
+# embedding cache, and a slow one is still awaited once, by retrieval
+ANSWER_CACHE_EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("ANSWER_CACHE_EMBEDDING_TIMEOUT_SECONDS", "0.2"))
+
+# Prompt context is packed from the best-matching passages of the retrieved chunks
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Semantic answer cache for repeated and near-duplicate questions
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.97"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+# Prompt templates for the temperature-0 completions
+KEYWORD_SYSTEM_PROMPT = "You are a specialized keyword extraction system for woodworking terminology. Extract 3-5 highly relevant and specific keywords or short phrases from the given text, focusing on technical terms, tool names, or specific woodworking techniques."
+KEYWORD_USER_TEMPLATE = "Generate keywords from this text: {text}"
+INITIAL_ANSWER_SYSTEM_PROMPT = "You are Jason Bent's woodworking expertise embodied in an AI. Answer the user's query based on the provided context, incorporating relevant product information without mentioning specific product names."
+INITIAL_ANSWER_USER_TEMPLATE = "Context: {context}\n\nQuestion: {query}"
+SINGLE_PASS_SYSTEM_PROMPT = "You are Jason Bent's woodworking expertise embodied in an AI. Answer the user's query based on the provided context, incorporating the related product information without naming specific products. Ensure the response is comprehensive, reflects Jason's expertise, and includes specific techniques or advice."
+SINGLE_PASS_USER_TEMPLATE = "Context: {context}\n\nRelated Products: {products}\n\nQuestion: {query}"
+REFINEMENT_SYSTEM_PROMPT = "Refine the answer to incorporate product information without naming specific products. Ensure the response is comprehensive, reflects Jason's expertise, and includes specific techniques or advice."
+REFINEMENT_USER_TEMPLATE = "Initial Answer: {answer}\n\nRelated Products: {products}\n\nProvide a final answer."
+
+# Completion cache; its namespace changes whenever a template above does
+COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", ".cache/completions.sqlite3")
+COMPLETION_CACHE_TTL_SECONDS = int(os.getenv("COMPLETION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+COMPLETION_CACHE_MAX_ITEMS = int(os.getenv("COMPLETION_CACHE_MAX_ITEMS", "2048"))
+COMPLETION_CACHE_MAX_MB = int(os.getenv("COMPLETION_CACHE_MAX_MB", "128"))
+PROMPT_VERSION = content_key(
+    KEYWORD_SYSTEM_PROMPT, KEYWORD_USER_TEMPLATE,
+    INITIAL_ANSWER_SYSTEM_PROMPT, INITIAL_ANSWER_USER_TEMPLATE,
+    SINGLE_PASS_SYSTEM_PROMPT, SINGLE_PASS_USER_TEMPLATE,
+    REFINEMENT_SYSTEM_PROMPT, REFINEMENT_USER_TEMPLATE
+)
+
+# Vector index names
 TRANSCRIPT_INDEX_NAME = "bents-woodworking"
 PRODUCT_INDEX_NAME = "bents-woodworking-products"
 
-# Initialize Pinecone indexes
-for INDEX_NAME in [TRANSCRIPT_INDEX_NAME, PRODUCT_INDEX_NAME]:
-    if INDEX_NAME not in pc.list_indexes().names():
-        pc.create_index(
-            name=INDEX_NAME,
-            dimension=1536,  # OpenAI embeddings dimension
-            metric='cosine',
-            spec=ServerlessSpec(cloud='aws', region='us-east-1')
+@st.cache_resource
+def open_vector_store(name):
+    if VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore(
+            os.path.join(LOCAL_VECTOR_STORE_PATH, name),
+            dimension=EMBEDDING_DIMENSION,
+            ann_threshold=LOCAL_ANN_THRESHOLD,
+            precision=LOCAL_VECTOR_PRECISION
         )
+    return PineconeVectorStore(
+        get_pinecone_client(),
+        name,
+        dimension=EMBEDDING_DIMENSION,
+        spec=ServerlessSpec(cloud='aws', region='us-east-1')
+    )
+
+transcript_index = open_vector_store(TRANSCRIPT_INDEX_NAME)
+product_index = open_vector_store(PRODUCT_INDEX_NAME)
+
+# Index stats drive UI decisions only, so a slightly stale count is fine
+INDEX_STATS_TTL_SECONDS = int(os.getenv("INDEX_STATS_TTL_SECONDS", "30"))
+
+@st.cache_data(ttl=INDEX_STATS_TTL_SECONDS, show_spinner=False)
+def get_index_stats(name):
+    stats = open_vector_store(name).describe_index_stats()
+    return {"total_vector_count": int(stats["total_vector_count"])}
+
+# Database Management lists products a page at a time
+PRODUCT_PAGE_SIZE = int(os.getenv("PRODUCT_PAGE_SIZE", "25"))
 
-transcript_index = pc.Index(TRANSCRIPT_INDEX_NAME)
-product_index = pc.Index(PRODUCT_INDEX_NAME)
+@st.cache_data(ttl=INDEX_STATS_TTL_SECONDS, show_spinner=False)
+def list_product_ids():
+    # IDs only; metadata for the visible page is looked up separately
+    return [product_id for page in product_index.list(limit=FETCH_BATCH_SIZE) for product_id in page]
+
+@st.cache_resource
+def get_product_catalog():
+    # Loaded once per process and kept in sync by the product CRUD helpers below
+    catalog = ProductIndex(dimension=EMBEDDING_DIMENSION)
+    catalog.load(product_index, page_size=FETCH_BATCH_SIZE)
+    return catalog
+
+product_catalog = get_product_catalog()
 
 # YouTube video links
 YOUTUBE_LINKS = {
@@ -226,12 +404,89 @@ EXAMPLE_QUESTIONS = [
     "What advantages does the Festool Trigger Clamp offer for quick release and one-handed use?"
 ]
 
-def generate_embedding(text):
-    response = openai_client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=text
+@st.cache_resource
+def get_embedding_cache():
+    # Shared across sessions and reruns; the SQLite tier also survives restarts
+    return EmbeddingCache(
+        EMBEDDING_CACHE_PATH,
+        max_memory_items=EMBEDDING_CACHE_MAX_ITEMS,
+        max_disk_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024
     )
-    return response.data[0].embedding
+
+embedding_cache = get_embedding_cache()
+
+@st.cache_resource
+def get_answer_cache():
+    return SemanticAnswerCache(
+        dimension=EMBEDDING_DIMENSION,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES
+    )
+
+answer_cache = get_answer_cache()
+
+@st.cache_resource
+def get_completion_cache():
+    return CompletionCache(
+        COMPLETION_CACHE_PATH,
+        namespace=PROMPT_VERSION,
+        max_memory_items=COMPLETION_CACHE_MAX_ITEMS,
+        max_disk_bytes=COMPLETION_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds=COMPLETION_CACHE_TTL_SECONDS
+    )
+
+completion_cache = get_completion_cache()
+
+@st.cache_resource
+def get_keyword_extractor():
+    # Transcript term statistics persist on disk; the product tag vocabulary comes from the catalog
+    extractor = KeywordExtractor(KEYWORD_STATS_PATH)
+    extractor.add_phrases(tag for _, metadata in product_catalog.products() for tag in metadata['tags'].split(','))
+    return extractor
+
+keyword_extractor = get_keyword_extractor()
+
+@st.cache_resource
+def get_transcript_lexical_index():
+    return BM25Index(LEXICAL_INDEX_PATH)
+
+transcript_lexical_index = get_transcript_lexical_index()
+
+@st.cache_resource
+def get_background_executor():
+    return ThreadPoolExecutor(max_workers=8)
+
+background_executor = get_background_executor()
+
+def generate_embeddings(texts):
+    texts = [normalize_text(text) for text in texts]
+    embeddings = [None] * len(texts)
+
+    # Serve what we can from the cache and embed each distinct remaining text once
+    missing = {}
+    for i, text in enumerate(texts):
+        cached = embedding_cache.get(EMBEDDING_MODEL, text)
+        if cached is not None:
+            embeddings[i] = cached.tolist()
+        else:
+            missing.setdefault(text, []).append(i)
+
+    pending = list(missing)
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+        with tracer.span("embedding", run_type="embedding"):
+            response = llm_client.embed(EMBEDDING_MODEL, batch)
+        for item in response.data:
+            text = batch[item.index]
+            embedding_cache.put(EMBEDDING_MODEL, text, item.embedding)
+            for i in missing[text]:
+                embeddings[i] = item.embedding
+
+    return embeddings
+
+def generate_embedding(text):
+    return generate_embeddings([text])[0]
 
 def add_product(title, tags, link):
     product_id = str(uuid.uuid4())
@@ -245,64 +500,96 @@ def add_product(title, tags, link):
     }
     
     product_index.upsert([(product_id, embedding, metadata)])
+    product_catalog.upsert(product_id, embedding, metadata)
+    keyword_extractor.add_phrases(tags)
+    answer_cache.invalidate()
+    get_index_stats.clear()
+    list_product_ids.clear()
     return product_id
 
 def get_all_products():
-    # Get the total number of vectors in the index
-    total_vectors = product_index.describe_index_stats()['total_vector_count']
-    
-    if total_vectors == 0:
-        return []  # Return an empty list if there are no products
-    
-    # Fetch all vector IDs
-    fetch_response = product_index.query(
-        vector=[0] * 1536,  # Dummy vector
-        top_k=total_vectors,
-        include_metadata=True
-    )
-    
-    products = []
-    for match in fetch_response['matches']:
-        metadata = match['metadata']
-        products.append((match['id'], metadata['title'], metadata['tags'], metadata['link']))
-    
-    return products
+    return [(product_id, metadata['title'], metadata['tags'], metadata['link'])
+            for product_id, metadata in product_catalog.products()]
 
+@tracer.traced("product_match", run_type="retriever")
 def query_products_for_keywords(keywords):
     query_text = ', '.join(keywords)
     query_embedding = generate_embedding(query_text)
     
-    results = product_index.query(
-        vector=query_embedding,
-        top_k=5,
-        include_metadata=True
-    )
+    results = product_catalog.query(query_embedding, top_k=5)
     
-    return [(match['id'], match['metadata']['title'], match['metadata']['tags'], match['metadata']['link']) 
-            for match in results['matches']]
+    return [(product_id, metadata['title'], metadata['tags'], metadata['link']) 
+            for product_id, _, metadata in results]
 
-def delete_product(product_id):
-    product_index.delete(ids=[product_id])
+def delete_products(product_ids):
+    delete_vectors(product_index, product_ids)
+    for product_id in product_ids:
+        product_catalog.delete(product_id)
+    answer_cache.invalidate()
+    get_index_stats.clear()
+    list_product_ids.clear()
 
-def update_product(product_id, title, tags, link):
-    tags_text = ', '.join(tags)
-    embedding = generate_embedding(tags_text)
-    
-    metadata = {
-        "title": title,
-        "tags": tags_text,
-        "link": link
-    }
-    
-    product_index.upsert([(product_id, embedding, metadata)])
+def import_products(products, dry_run=False, remove_missing=False):
+    # Applies a bulk import planned against the in-memory catalog. Changed tag strings
+    # are embedded in batches; rows whose tags are unchanged reuse the stored vector.
+    actions = plan_import(products, product_catalog.products(), remove_missing=remove_missing)
+    if dry_run:
+        return actions
 
-def get_product_by_id(product_id):
-    fetch_response = product_index.fetch(ids=[product_id])
-    if product_id in fetch_response['vectors']:
-        vector = fetch_response['vectors'][product_id]
-        metadata = vector['metadata']
-        return (product_id, metadata['title'], metadata['tags'], metadata['link'])
-    return None
+    to_embed = [(product_id, product) for action, product_id, _, product in actions if action in ("add", "update")]
+    embeddings = generate_embeddings([', '.join(product['tags']) for _, product in to_embed])
+    vectors = []
+    for (product_id, product), embedding in zip(to_embed, embeddings):
+        vectors.append((product_id or str(uuid.uuid4()), embedding, product))
+    for action, product_id, _, product in actions:
+        if action == "relabel":
+            vectors.append((product_id, product_catalog.vector(product_id).tolist(), product))
+
+    records = [
+        (product_id, embedding, {"title": product['title'], "tags": ', '.join(product['tags']), "link": product['link']})
+        for product_id, embedding, product in vectors
+    ]
+    removed_ids = [product_id for action, product_id, _, _ in actions if action == "remove"]
+    upsert_vectors(product_index, records)
+    delete_vectors(product_index, removed_ids)
+
+    for product_id, embedding, metadata in records:
+        product_catalog.upsert(product_id, embedding, metadata)
+    for product_id in removed_ids:
+        product_catalog.delete(product_id)
+    keyword_extractor.add_phrases(tag for _, _, product in vectors for tag in product['tags'])
+    if records or removed_ids:
+        answer_cache.invalidate()
+        get_index_stats.clear()
+        list_product_ids.clear()
+    return actions
+
+def filter_product_ids(text):
+    terms = text.lower().split()
+    return sorted(
+        product_id for product_id, metadata in product_catalog.products()
+        if all(term in f"{metadata['title']} {metadata['tags']}".lower() for term in terms)
+    )
+
+def fetch_products(product_ids):
+    # Served from the in-memory catalog; IDs added by another process are fetched in one batch
+    found = {}
+    missing = []
+    for product_id in product_ids:
+        metadata = product_catalog.get(product_id)
+        if metadata is None:
+            missing.append(product_id)
+        else:
+            found[product_id] = metadata
+    if missing:
+        fetch_response = product_index.fetch(ids=missing)
+        for product_id, vector in fetch_response['vectors'].items():
+            product_catalog.upsert(product_id, vector['values'], vector['metadata'])
+            found[product_id] = vector['metadata']
+    return [
+        (product_id, found[product_id]['title'], found[product_id]['tags'], found[product_id]['link'])
+        for product_id in product_ids if product_id in found
+    ]
 
 def load_initial_data():
     initial_products = [
@@ -313,132 +600,503 @@ def load_initial_data():
         ("Festool Trigger Clamp", "Quick release, One-handed operation, Versatile clamping, Woodworking, Assembly, Glue-ups", "https://amzn.to/2HoVydC")
     ]
     
-    for title, tags, link in initial_products:
-        add_product(title, tags.split(', '), link)
+    import_products([
+        {"id": None, "title": title, "tags": tags.split(', '), "link": link}
+        for title, tags, link in initial_products
+    ])
     
     st.success("Initial product data loaded successfully!")
 
-def safe_run_tree(name, run_type):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            try:
-                with trace(name=name, run_type=run_type, client=langsmith_client) as run:
-                    result = func(*args, **kwargs)
-                    run.end(outputs={"result": str(result)})
-                    return result
-            except Exception as e:
-                st.error(f"Error in LangSmith tracing: {str(e)}")
-                return func(*args, **kwargs)
-        return wrapper
-    return decorator
-
-def extract_text_from_docx(file):
-    doc = Document(file)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text
-
-def extract_metadata_from_text(text):
-    title = text.split('\n')[0] if text else "Untitled Video"
-    return {"title": title}
+def upsert_vectors(index, vectors):
+    for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        index.upsert(vectors[start:start + UPSERT_BATCH_SIZE])
 
-def upsert_transcript(transcript_text, metadata):
-    chunks = [transcript_text[i:i+8000] for i in range(0, len(transcript_text), 8000)]
-    for i, chunk in enumerate(chunks):
-        embedding = generate_embedding(chunk)
+def delete_vectors(index, ids):
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        index.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+
+def chunk_transcript(transcript_text, metadata):
+    chunk_records = []
+    spans = chunk_text(transcript_text, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS)
+    for i, (start, end) in enumerate(spans):
+        chunk = transcript_text[start:end]
         chunk_metadata = metadata.copy()
         chunk_metadata['text'] = chunk
         chunk_metadata['chunk_id'] = f"{metadata['title']}_chunk_{i}"
-        transcript_index.upsert([(chunk_metadata['chunk_id'], embedding, chunk_metadata)])
+        chunk_metadata['content_hash'] = content_key(normalize_text(chunk))
+        chunk_metadata['start_char'] = start
+        chunk_metadata['end_char'] = end
+        chunk_records.append(chunk_metadata)
+    return chunk_records
+
+def get_transcript_chunk_hashes(title):
+    # Every stored chunk of a transcript shares the "{title}_chunk_" ID prefix
+    chunk_ids = [chunk_id for page in transcript_index.list(prefix=f"{title}_chunk_") for chunk_id in page]
+    hashes = {}
+    for start in range(0, len(chunk_ids), FETCH_BATCH_SIZE):
+        fetch_response = transcript_index.fetch(ids=chunk_ids[start:start + FETCH_BATCH_SIZE])
+        for chunk_id, vector in fetch_response['vectors'].items():
+            metadata = vector['metadata'] or {}
+            if metadata.get('title') == title:
+                hashes[chunk_id] = metadata.get('content_hash')
+    return hashes
+
+def plan_transcript_update(transcript_text, metadata):
+    chunk_records = chunk_transcript(transcript_text, metadata)
+    existing = get_transcript_chunk_hashes(metadata['title'])
+
+    summary = {"title": metadata['title'], "added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    stale_records = []
+    for record in chunk_records:
+        stored_hash = existing.get(record['chunk_id'], False)
+        if stored_hash == record['content_hash']:
+            summary["unchanged"] += 1
+        else:
+            summary["added" if stored_hash is False else "changed"] += 1
+            stale_records.append(record)
+
+    keyword_extractor.add_documents((record['content_hash'], record['text']) for record in stale_records)
+
+    # Only chunks whose content hash differs from the stored one are re-embedded
+    embeddings = generate_embeddings([record['text'] for record in stale_records])
+    vectors = [(record['chunk_id'], embedding, record) for record, embedding in zip(stale_records, embeddings)]
+
+    current_ids = {record['chunk_id'] for record in chunk_records}
+    orphaned_ids = [chunk_id for chunk_id in existing if chunk_id not in current_ids]
+    summary["removed"] = len(orphaned_ids)
+
+    for record in stale_records:
+        transcript_lexical_index.add(record['chunk_id'], record['title'], record['text'])
+    for chunk_id in orphaned_ids:
+        transcript_lexical_index.remove(chunk_id)
+    return vectors, orphaned_ids, summary
+
+def upsert_transcript(transcript_text, metadata):
+    vectors, orphaned_ids, summary = plan_transcript_update(transcript_text, metadata)
+    upsert_vectors(transcript_index, vectors)
+    delete_vectors(transcript_index, orphaned_ids)
+    if vectors or orphaned_ids:
+        answer_cache.invalidate()
+        keyword_extractor.save()
+        transcript_lexical_index.save()
+    return summary
+
+def load_transcript(file):
+    transcript_text = extract_text_from_docx(file)
+    return transcript_text, extract_metadata_from_text(transcript_text)
+
+@st.cache_data(max_entries=256)
+def parse_transcript_upload(data):
+    # Keyed on the file bytes so reruns don't re-parse the same upload
+    return load_transcript(io.BytesIO(data))
+
+def ingest_transcripts(sources, load=load_transcript, max_workers=INGEST_MAX_WORKERS, on_result=None, on_error=None):
+    # Parse and embed files on a bounded worker pool while a single writer drains
+    # vectors into batched upserts. The bounded queue applies backpressure to the
+    # workers whenever upserts fall behind, and only 2 * max_workers files are in
+    # flight so sources can be a lazy stream. on_result(source, summary) is called
+    # from the writer thread once every vector of that file has been upserted. With
+    # on_error(source, exception), a file that fails to load or embed is reported and
+    # skipped; a failed upsert still stops the whole run.
+    pending = queue.Queue(maxsize=UPSERT_BATCH_SIZE * 2)
+    failed = threading.Event()
+    errors = []
+    results = []
+
+    def writer():
+        batch = []
+        finished = []
+
+        def flush():
+            if batch:
+                transcript_index.upsert(batch)
+                batch.clear()
+            for source, summary in finished:
+                results.append(summary)
+                if on_result:
+                    on_result(source, summary)
+            finished.clear()
+
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                kind, payload = item
+                if kind == "vector":
+                    batch.append(payload)
+                    if len(batch) >= UPSERT_BATCH_SIZE:
+                        flush()
+                else:
+                    finished.append(payload)
+            flush()
+        except Exception as e:
+            errors.append(e)
+            failed.set()
+
+    def enqueue(item):
+        while not failed.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("Transcript upsert failed") from errors[0]
+
+    def process(source):
+        transcript_text, metadata = load(source)
+        vectors, orphaned_ids, summary = plan_transcript_update(transcript_text, metadata)
+        delete_vectors(transcript_index, orphaned_ids)
+        for vector in vectors:
+            enqueue(("vector", vector))
+        enqueue(("done", (source, summary)))
+
+    def process_or_report(source):
+        try:
+            process(source)
+        except Exception as e:
+            if on_error is None or failed.is_set():
+                raise
+            on_error(source, e)
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            for source in sources:
+                if len(in_flight) >= 2 * max_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(executor.submit(process_or_report, source))
+            for future in in_flight:
+                future.result()
+    finally:
+        try:
+            enqueue(None)
+        except RuntimeError:
+            pass
+        writer_thread.join()
+        if any(summary["added"] or summary["changed"] or summary["removed"] for summary in results):
+            answer_cache.invalidate()
+            keyword_extractor.save()
+            transcript_lexical_index.save()
+    if errors:
+        raise errors[0]
+    return results
+
+def rebuild_lexical_index():
+    # Re-indexes every stored chunk, e.g. for transcripts ingested before the lexical index existed
+    transcript_lexical_index.clear()
+    chunk_ids = [chunk_id for page in transcript_index.list(limit=FETCH_BATCH_SIZE) for chunk_id in page]
+    for start in range(0, len(chunk_ids), FETCH_BATCH_SIZE):
+        fetch_response = transcript_index.fetch(ids=chunk_ids[start:start + FETCH_BATCH_SIZE])
+        for chunk_id, vector in fetch_response['vectors'].items():
+            metadata = vector['metadata']
+            transcript_lexical_index.add(chunk_id, metadata['title'], metadata['text'])
+    transcript_lexical_index.save()
+    return len(chunk_ids)
+
+pending_query_embeddings = {}
+pending_query_embeddings_lock = threading.Lock()
+
+def embed_query(query, timeout=EMBEDDING_TIMEOUT_SECONDS):
+    # Returns None if the embedding isn't back within the timeout; the request keeps
+    # running in the background and lands in the embedding cache for the next caller
+    with pending_query_embeddings_lock:
+        future = pending_query_embeddings.get(query)
+        if future is None:
+            future = background_executor.submit(generate_embedding, query)
+            pending_query_embeddings[query] = future
+            future.add_done_callback(lambda _: pending_query_embeddings.pop(query, None))
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeout:
+        return None
 
 def query_transcripts(query):
-    query_embedding = generate_embedding(query)
-    result = transcript_index.query(
-        vector=query_embedding,
-        top_k=3,
-        include_metadata=True
-    )
-    return [(match['metadata']['title'], match['metadata']['text']) for match in result['matches']]
+    with tracer.span("lexical_search", run_type="retriever"):
+        lexical_ids = [chunk_id for chunk_id, _ in transcript_lexical_index.search(query, top_k=RETRIEVAL_CANDIDATES)]
 
-@safe_run_tree(name="generate_keywords", run_type="llm")
-def generate_keywords(text):
-    chat = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
-    
-    system_message = SystemMessage(content="You are a specialized keyword extraction system for woodworking terminology. Extract 3-5 highly relevant and specific keywords or short phrases from the given text, focusing on technical terms, tool names, or specific woodworking techniques.")
-    human_message = HumanMessage(content=f"Generate keywords from this text: {text}")
-    
+    # Wait on a slow embedding service only when there is no lexical fallback
+    query_embedding = embed_query(query, timeout=EMBEDDING_TIMEOUT_SECONDS if lexical_ids else None)
+    vector_ids = []
+    chunks = {}
+    if query_embedding is not None:
+        with tracer.span("vector_query", run_type="retriever"):
+            result = transcript_index.query(
+                vector=query_embedding,
+                top_k=RETRIEVAL_CANDIDATES,
+                include_metadata=True
+            )
+        for match in result['matches']:
+            vector_ids.append(match['id'])
+            chunks[match['id']] = (match['metadata']['title'], match['metadata']['text'])
+
+    chunk_ids = reciprocal_rank_fusion([vector_ids, lexical_ids])[:RETRIEVAL_TOP_K]
+    missing_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in chunks]
+    if missing_ids:
+        fetch_response = transcript_index.fetch(ids=missing_ids)
+        for chunk_id, vector in fetch_response['vectors'].items():
+            chunks[chunk_id] = (vector['metadata']['title'], vector['metadata']['text'])
+    return [chunks[chunk_id] for chunk_id in chunk_ids if chunk_id in chunks]
+
+def chat_messages(system_prompt, user_message):
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
+
+@tracer.traced("completion", run_type="llm")
+def chat_completion(system_prompt, user_message):
+    # Every completion runs at temperature 0, so identical prompts can reuse a stored answer
+    cached = completion_cache.get(CHAT_MODEL, system_prompt, user_message)
+    if cached is not None:
+        return cached
     with get_openai_callback() as cb:
-        response = chat([system_message, human_message])
+        response = llm_client.complete(CHAT_MODEL, chat_messages(system_prompt, user_message))
+    completion_cache.put(CHAT_MODEL, system_prompt, user_message, response)
+    return response
+
+def chat_completion_stream(system_prompt, user_message):
+    cached = completion_cache.get(CHAT_MODEL, system_prompt, user_message)
+    if cached is not None:
+        yield cached
+        return
+    tokens = []
+    for token in llm_client.stream(CHAT_MODEL, chat_messages(system_prompt, user_message)):
+        tokens.append(token)
+        yield token
+    # Only a stream that ran to completion is stored
+    completion_cache.put(CHAT_MODEL, system_prompt, user_message, "".join(tokens))
+
+@tracer.traced("generate_keywords_llm", run_type="chain")
+def generate_keywords_llm(text):
+    response = chat_completion(KEYWORD_SYSTEM_PROMPT, KEYWORD_USER_TEMPLATE.format(text=text))
     
-    keywords = response.content.strip().split(',')
+    keywords = response.strip().split(',')
     return [keyword.strip().lower() for keyword in keywords if keyword.strip()]
 
-@safe_run_tree(name="get_answer", run_type="chain")
-def get_answer(context, user_query):
-    chat = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
-    
-    system_message = SystemMessage(content="You are Jason Bent's woodworking expertise embodied in an AI. Answer the user's query based on the provided context, incorporating relevant product information without mentioning specific product names.")
-    human_message = HumanMessage(content=f"Context: {context}\n\nQuestion: {user_query}")
-    
-    with get_openai_callback() as cb:
-        response = chat([system_message, human_message])
-    initial_answer = response.content
+def generate_keywords(text):
+    if KEYWORD_EXTRACTOR == "local":
+        keywords = keyword_extractor.extract(text)
+        if keywords:
+            return keywords
+    return generate_keywords_llm(text)
+
+async def run_stage(timings, stage, func, *args):
+    # Blocking calls run in worker threads so independent stages overlap
+    start = time.perf_counter()
+    try:
+        with tracer.span(stage):
+            return await asyncio.to_thread(func, *args)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+async def lookup_query_keywords(user_query, timings, with_products):
+    query_keywords = await run_stage(timings, "query_keywords", generate_keywords, user_query)
+    related_products = None
+    if with_products:
+        related_products = await run_stage(timings, "product_lookup", query_products_for_keywords, query_keywords)
+    return query_keywords, related_products
+
+async def prepare_from_context(context, user_query, single_pass, timings, keyword_lookup=None, on_products=None):
+    # Runs every stage up to the final completion and returns that completion's
+    # prompt as (stage, system_prompt, user_message) so it can be streamed
+    if keyword_lookup is None:
+        keyword_lookup = asyncio.ensure_future(lookup_query_keywords(user_query, timings, with_products=single_pass))
+
+    if single_pass:
+        query_keywords, related_products = await keyword_lookup
+        if on_products:
+            on_products(related_products)
+        final_prompt = (
+            "answer",
+            SINGLE_PASS_SYSTEM_PROMPT,
+            SINGLE_PASS_USER_TEMPLATE.format(context=context, products=related_products, query=user_query)
+        )
+        return final_prompt, related_products, query_keywords
+
+    # The initial answer and the query keyword extraction don't depend on each other
+    initial_answer, (query_keywords, _) = await asyncio.gather(
+        run_stage(
+            timings, "initial_answer", chat_completion,
+            INITIAL_ANSWER_SYSTEM_PROMPT,
+            INITIAL_ANSWER_USER_TEMPLATE.format(context=context, query=user_query)
+        ),
+        keyword_lookup
+    )
     
-    query_keywords = generate_keywords(user_query)
-    answer_keywords = generate_keywords(initial_answer)
+    answer_keywords = await run_stage(timings, "answer_keywords", generate_keywords, initial_answer)
     all_keywords = list(set(query_keywords + answer_keywords))
-    related_products = query_products_for_keywords(all_keywords)
-    
-    system_message_2 = SystemMessage(content="Refine the answer to incorporate product information without naming specific products. Ensure the response is comprehensive, reflects Jason's expertise, and includes specific techniques or advice.")
-    human_message_2 = HumanMessage(content=f"Initial Answer: {initial_answer}\n\nRelated Products: {related_products}\n\nProvide a final answer.")
+    related_products = await run_stage(timings, "product_lookup", query_products_for_keywords, all_keywords)
+    if on_products:
+        on_products(related_products)
     
-    with get_openai_callback() as cb:
-        final_response = chat([system_message_2, human_message_2])
-    final_answer = final_response.content
+    final_prompt = (
+        "refinement",
+        REFINEMENT_SYSTEM_PROMPT,
+        REFINEMENT_USER_TEMPLATE.format(answer=initial_answer, products=related_products)
+    )
+    return final_prompt, related_products, all_keywords
+
+def complete_final_prompt(final_prompt, timings):
+    stage, system_prompt, user_message = final_prompt
+    start = time.perf_counter()
+    with tracer.span(stage):
+        final_answer = chat_completion(system_prompt, user_message)
+    timings[stage] = time.perf_counter() - start
+    return final_answer
+
+def stream_final_prompt(final_prompt, timings):
+    stage, system_prompt, user_message = final_prompt
+    start = time.perf_counter()
+    for i, token in enumerate(chat_completion_stream(system_prompt, user_message)):
+        if i == 0:
+            timings["first_token"] = time.perf_counter() - start
+            tracer.record("first_token", timings["first_token"], run_type="llm")
+        yield token
+    timings[stage] = time.perf_counter() - start
+    tracer.record(stage, timings[stage], run_type="llm")
+
+@tracer.traced("get_answer")
+def get_answer(context, user_query, single_pass=False, timings=None):
+    timings = {} if timings is None else timings
+    final_prompt, related_products, keywords = asyncio.run(prepare_from_context(context, user_query, single_pass, timings))
+    return complete_final_prompt(final_prompt, timings), related_products, keywords
+
+async def prepare_answer_async(query, single_pass, timings, on_matches=None, on_products=None):
+    # Query keywords only need the question, so they are extracted while the transcripts are searched
+    keyword_lookup = asyncio.ensure_future(lookup_query_keywords(query, timings, with_products=single_pass))
+    matches = await run_stage(timings, "transcript_retrieval", query_transcripts, query)
+    if not matches:
+        keyword_lookup.cancel()
+        return matches, None, None, []
+    if on_matches:
+        on_matches(matches)
     
-    return final_answer, related_products, all_keywords
+    start = time.perf_counter()
+    context = build_context(query, matches, token_budget=CONTEXT_TOKEN_BUDGET)
+    timings["context_packing"] = time.perf_counter() - start
+    final_prompt, related_products, keywords = await prepare_from_context(
+        context, query, single_pass, timings, keyword_lookup, on_products=on_products
+    )
+    return matches, final_prompt, related_products, keywords
+
+@tracer.traced("prepare_answer")
+def prepare_answer(query, single_pass=False, timings=None, on_matches=None, on_products=None):
+    timings = {} if timings is None else timings
+    return asyncio.run(prepare_answer_async(query, single_pass, timings, on_matches, on_products))
+
+def reload_shared_indexes():
+    # ingest.py saves the lexical index and keyword stats to the same files; a save from
+    # another process means the transcripts changed, so cached answers are stale too
+    changed = transcript_lexical_index.refresh()
+    changed = keyword_extractor.refresh() or changed
+    if changed:
+        answer_cache.invalidate()
+
+def lookup_cached_answer(query, single_pass, timings):
+    # The query embedding is reused by query_transcripts through the embedding cache on a miss
+    start = time.perf_counter()
+    reload_shared_indexes()
+    query_embedding = embed_query(query, timeout=ANSWER_CACHE_EMBEDDING_TIMEOUT_SECONDS)
+    cached = answer_cache.get(query_embedding, tag=single_pass) if query_embedding is not None else None
+    timings["answer_cache"] = time.perf_counter() - start
+    return cached
+
+def store_cached_answer(query, single_pass, final_answer, related_products, keywords, matches):
+    query_embedding = embed_query(query)
+    if query_embedding is not None:
+        answer_cache.put(query_embedding, (final_answer, related_products, keywords, matches), tag=single_pass)
+
+@tracer.traced("answer_query")
+def answer_query(query, single_pass=False):
+    timings = {}
+    start = time.perf_counter()
+    cached = lookup_cached_answer(query, single_pass, timings)
+    if cached:
+        final_answer, related_products, keywords, matches = cached
+    else:
+        matches, final_prompt, related_products, keywords = prepare_answer(query, single_pass, timings)
+        final_answer = complete_final_prompt(final_prompt, timings) if matches else None
+        if matches:
+            store_cached_answer(query, single_pass, final_answer, related_products, keywords, matches)
+    timings["total"] = time.perf_counter() - start
+    return matches, final_answer, related_products, keywords, timings
+
+def related_video(matches):
+    # The first retrieved transcript with a known video, as (title, link)
+    for title, _ in matches:
+        if title in YOUTUBE_LINKS:
+            return title, YOUTUBE_LINKS[title]
+    return None
+
+def render_related_video(matches):
+    st.subheader("Related Video")
+    video = related_video(matches)
+    if video:
+        title, link = video
+        # Watch links carry the ID in ?v=, Shorts links in the last path segment
+        video_id = link.split("v=")[1].split("&")[0] if "v=" in link else link.rstrip("/").rsplit("/", 1)[-1]
+        st.markdown(f'<iframe width="100%" height="315" src="https://www.youtube.com/embed/{video_id}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe>', unsafe_allow_html=True)
+        st.caption(f"Video: {title}")
+        return
+    st.write("No related video found.")
+
+def render_related_products(related_products):
+    st.subheader("Related Products")
+    if related_products:
+        for product in related_products:
+            st.markdown(f"[{product[1]}]({product[3]})")
+    else:
+        st.write("No related products found.")
 
 def process_query(query):
     if query:
-        with st.spinner("Searching for the best answer..."):
-            matches = query_transcripts(query)
-            if matches:
-                context = " ".join([f"Title: {title}\n{text}" for title, text in matches])
-                final_answer, related_products, keywords = get_answer(context, query)
-                
+        # Lay out the answer area and both columns up front so each fills in as soon as its data is ready
+        answer_area = st.container()
+        st.markdown("<br><br>", unsafe_allow_html=True)
+        col1, space, col2 = st.columns([0.47, 0.06, 0.47])
+        video_area = col1.empty()
+        products_area = col2.empty()
+        
+        def show_video(matches):
+            with video_area.container():
+                render_related_video(matches)
+        
+        def show_products(related_products):
+            with products_area.container():
+                render_related_products(related_products)
+        
+        timings = {}
+        start = time.perf_counter()
+        single_pass = st.session_state.get('single_pass', SINGLE_PASS_ANSWERS)
+        with answer_area:
+            cached = lookup_cached_answer(query, single_pass, timings)
+            if cached:
+                final_answer, related_products, keywords, matches = cached
+                show_video(matches)
+                show_products(related_products)
                 st.write(final_answer)
-                st.markdown("<br><br>", unsafe_allow_html=True)
-                
-                col1, space, col2 = st.columns([0.47, 0.06, 0.47])
-                
-                with col1:
-                    st.subheader("Related Video")
-                    video_displayed = False
-                    for title, _ in matches:
-                        if title in YOUTUBE_LINKS:
-                            video_id = YOUTUBE_LINKS[title].split("v=")[1].split("&")[0]
-                            st.markdown(f'<iframe width="100%" height="315" src="https://www.youtube.com/embed/{video_id}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe>', unsafe_allow_html=True)
-                            st.caption(f"Video: {title}")
-                            video_displayed = True
-                            break
-                    if not video_displayed:
-                        st.write("No related video found.")
-                
-                with col2:
-                    st.subheader("Related Products")
-                    if related_products:
-                        for product in related_products:
-                            st.markdown(f"[{product[1]}]({product[3]})")
-                    else:
-                        st.write("No related products found.")
-                
-                st.markdown("<br><br>", unsafe_allow_html=True)
-                
-                if 'chat_history' not in st.session_state:
-                    st.session_state.chat_history = []
-                st.session_state.chat_history.append((query, final_answer, related_products, matches[0][0] if matches else None))
+            else:
+                with st.spinner("Searching for the best answer..."):
+                    matches, final_prompt, related_products, keywords = prepare_answer(
+                        query, single_pass, timings, on_matches=show_video, on_products=show_products
+                    )
+                if matches:
+                    final_answer = st.write_stream(stream_final_prompt(final_prompt, timings))
+                    store_cached_answer(query, single_pass, final_answer, related_products, keywords, matches)
+            if matches:
+                timings["total"] = time.perf_counter() - start
+                st.caption(" · ".join(f"{stage}: {seconds * 1000:.0f} ms" for stage, seconds in timings.items()))
             else:
                 st.warning("I couldn't find a specific answer to your question. Please try rephrasing or ask something else.")
+        
+        if matches:
+            st.markdown("<br><br>", unsafe_allow_html=True)
+            
+            if 'chat_history' not in st.session_state:
+                st.session_state.chat_history = []
+            st.session_state.chat_history.append((query, final_answer, related_products, matches[0][0] if matches else None))
     else:
         st.warning("Please enter a question before searching.")
 
@@ -450,6 +1108,8 @@ def query_interface():
     if 'current_query' not in st.session_state:
         st.session_state.current_query = ""
 
+    st.checkbox("Single-pass answers (faster, one completion)", value=SINGLE_PASS_ANSWERS, key='single_pass')
+
     st.subheader("Popular Questions")
     for question in st.session_state.selected_questions:
         if st.button(question, key=question):
@@ -486,16 +1146,87 @@ def query_interface():
                     else:
                         st.write("No related products found.")
 
+def product_browser():
+    # Only the visible page is materialized; filtering runs over the in-memory catalog
+    filter_text = st.text_input("Filter by title or tag").strip()
+    product_ids = filter_product_ids(filter_text) if filter_text else list_product_ids()
+    if not product_ids:
+        st.write("No products match the filter." if filter_text else "The database is empty.")
+        return
+
+    page_count = (len(product_ids) + PRODUCT_PAGE_SIZE - 1) // PRODUCT_PAGE_SIZE
+    page = st.number_input(f"Page (of {page_count}, {len(product_ids)} products)", min_value=1, max_value=page_count, value=1, step=1)
+    page_ids = product_ids[(page - 1) * PRODUCT_PAGE_SIZE:page * PRODUCT_PAGE_SIZE]
+    df = pd.DataFrame(fetch_products(page_ids), columns=['ID', 'Title', 'Tags', 'Link'])
+    df['Delete'] = False
+    # Saving bumps the version so the editor starts fresh instead of replaying its
+    # edits (including ticked Delete boxes) onto the rows that shifted into place
+    version = st.session_state.setdefault("product_editor_version", 0)
+    edited = st.data_editor(df, key=f"products_{filter_text}_{page}_{version}", disabled=['ID'], hide_index=True)
+    if "product_editor_message" in st.session_state:
+        st.success(st.session_state.pop("product_editor_message"))
+
+    if st.button("Save Changes"):
+        delete_ids = edited.loc[edited['Delete'], 'ID'].tolist()
+        rows = [
+            {"id": row.ID, "title": str(row.Title).strip(), "tags": split_tags(str(row.Tags)), "link": str(row.Link).strip()}
+            for row in edited.itertuples() if not row.Delete
+        ]
+        if any(not row['title'] or not row['tags'] for row in rows):
+            st.warning("Every product needs a title and at least one tag.")
+            return
+        # Rows that weren't edited come back as "unchanged" and cost nothing
+        counts = summarize_plan(import_products(rows))
+        if delete_ids:
+            delete_products(delete_ids)
+        st.session_state.product_editor_version = version + 1
+        st.session_state.product_editor_message = f"Saved: {counts['update'] + counts['relabel']} updated, {len(delete_ids)} deleted"
+        st.rerun()
+
 def database_interface():
     st.subheader("All Products")
-    products = get_all_products()
-    if products:
-        df = pd.DataFrame(products, columns=['ID', 'Title', 'Tags', 'Links'])
-        st.dataframe(df)
-    else:
-        st.write("The database is empty.")
-        if st.button("Load Initial Data"):
-            load_initial_data()
+    if st.button("Reload Catalog"):
+        # Picks up changes made to the Pinecone index by other processes
+        product_catalog.load(product_index, page_size=FETCH_BATCH_SIZE)
+        list_product_ids.clear()
+        answer_cache.invalidate()
+    product_browser()
+
+    st.subheader("Import / Export")
+    export_columns = st.columns(2)
+    # The files are generated only when a button is clicked
+    export_columns[0].download_button(
+        "Export CSV", lambda: write_products(get_all_products(), "csv"), file_name="products.csv", mime="text/csv"
+    )
+    export_columns[1].download_button(
+        "Export JSON", lambda: write_products(get_all_products(), "json"), file_name="products.json", mime="application/json"
+    )
+    import_file = st.file_uploader("Import products (CSV or JSON with title, tags, link and optional id)", type=["csv", "json"])
+    if import_file:
+        remove_missing = st.checkbox("Delete products that are not in the file")
+        try:
+            import_rows = read_products(import_file.getvalue(), import_file.name.rsplit('.', 1)[-1].lower())
+        except ValueError as e:
+            st.error(f"Could not read {import_file.name}: {e}")
+            import_rows = None
+        if import_rows is not None:
+            preview_column, apply_column = st.columns(2)
+            dry_run = preview_column.button("Preview Changes")
+            if dry_run or apply_column.button("Apply Import"):
+                actions = import_products(import_rows, dry_run=dry_run, remove_missing=remove_missing)
+                counts = summarize_plan(actions)
+                summary = ", ".join(f"{count} {action}" for action, count in counts.items())
+                if dry_run:
+                    st.info(f"Would apply: {summary}")
+                else:
+                    st.success(f"Imported: {summary}")
+                changes = [
+                    (action, product_id or "(new)", (new or old)['title'],
+                     old['tags'] if old else "", ', '.join(new['tags']) if new else "")
+                    for action, product_id, old, new in actions if action != "unchanged"
+                ]
+                if changes:
+                    st.dataframe(pd.DataFrame(changes, columns=['Action', 'ID', 'Title', 'Old Tags', 'New Tags']))
 
     st.subheader("Add New Product")
     new_title = st.text_input("Title")
@@ -508,25 +1239,6 @@ def database_interface():
         else:
             st.warning("Please fill in all fields.")
 
-    st.subheader("Update Product")
-    update_id = st.text_input("Enter Product ID to update")
-    if update_id:
-        product = get_product_by_id(update_id)
-        if product:
-            update_title = st.text_input("New Title", value=product[1])
-            update_tags = st.text_input("New Tags", value=product[2])
-            update_link = st.text_input("New Link", value=product[3])
-            if st.button("Update Product"):
-                update_product(update_id, update_title, update_tags.split(','), update_link)
-                st.success(f"Product with ID {update_id} updated successfully!")
-        else:
-            st.warning(f"No product found with ID {update_id}")
-
-    st.subheader("Delete Product")
-    delete_id = st.text_input("Enter Product ID to delete")
-    if st.button("Delete Product"):
-        delete_product(delete_id)
-        st.success(f"Product with ID {delete_id} deleted successfully!")
 
 def main():
     st.set_page_config(page_title="Bent's Woodworking Assistant", layout="wide")
@@ -538,7 +1250,7 @@ def main():
     st.title("Bent's Woodworking Assistant")
 
     # Check if the database is empty and offer to load initial data
-    if not get_all_products():
+    if get_index_stats(PRODUCT_INDEX_NAME)["total_vector_count"] == 0:
         st.warning("The product database is empty. Would you like to load some initial data?")
         if st.button("Load Initial Data"):
             load_initial_data()
@@ -546,6 +1258,17 @@ def main():
     st.sidebar.title("Navigation")
     page = st.sidebar.radio("Select a page", ["Query Interface", "Database Management"])
 
+    with st.sidebar.expander("Performance"):
+        stage_stats = tracer.stage_stats()
+        if stage_stats:
+            st.dataframe(pd.DataFrame(stage_stats).set_index("stage"))
+        else:
+            st.caption("No traced requests yet.")
+        st.caption(f"Embedding cache: {embedding_cache.stats()}")
+        st.caption(f"Answer cache: {answer_cache.stats()}")
+        st.caption(f"Completion cache: {completion_cache.stats()}")
+        st.caption(f"OpenAI client: {llm_client.stats()}")
+
     if page == "Query Interface":
         query_interface()
     elif page == "Database Management":
@@ -558,17 +1281,20 @@ def main():
             if uploaded_files:
                 all_metadata = []
                 for uploaded_file in uploaded_files:
-                    transcript_text = extract_text_from_docx(uploaded_file)
-                    metadata = extract_metadata_from_text(transcript_text)
+                    transcript_text, metadata = parse_transcript_upload(uploaded_file.getvalue())
                     all_metadata.append((metadata, transcript_text))
                 st.subheader("Uploaded Transcripts")
                 for metadata, _ in all_metadata:
                     st.text(f"Title: {metadata['title']}")
                 if st.button("Upsert All Transcripts"):
                     with st.spinner("Upserting transcripts..."):
-                        for metadata, transcript_text in all_metadata:
-                            upsert_transcript(transcript_text, metadata)
+                        summaries = ingest_transcripts(all_metadata, load=lambda item: (item[1], item[0]))
                         st.success("All transcripts upserted successfully!")
+                    st.dataframe(pd.DataFrame(summaries, columns=['title', 'added', 'changed', 'unchanged', 'removed']))
+            if st.button("Rebuild Search Index"):
+                with st.spinner("Rebuilding the transcript search index..."):
+                    chunk_count = rebuild_lexical_index()
+                st.success(f"Indexed {chunk_count} transcript chunks.")
 
 if __name__ == "__main__":
     main()
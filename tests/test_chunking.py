@@ -0,0 +1,68 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import chunk_text, iter_segments, split_long_segment
+
+
+def segments(text):
+    return [text[start:end] for start, end, _ in iter_segments(text)]
+
+
+def chunks(text, **kwargs):
+    return [text[start:end] for start, end in chunk_text(text, **kwargs)]
+
+
+def sentence(word, tokens=10):
+    # Exactly `tokens` estimated tokens, at four characters per token
+    return (word * tokens * 4)[:tokens * 4 - 1] + "."
+
+
+def test_terminators_inside_tokens_stay_in_one_segment():
+    text = 'In Episode 2.5 we cut a 1.5 inch dado, e.g.a sled cut. See example.com for plans! He said "stop." Done'
+    assert segments(text) == [
+        "In Episode 2.5 we cut a 1.5 inch dado, e.g.a sled cut.",
+        "See example.com for plans!",
+        'He said "stop."',
+        "Done",
+    ]
+
+
+def test_paragraph_starts_are_flagged():
+    text = "First paragraph ends here.\n\nSecond one has no period\nThird line. Done."
+    flags = [(text[start:end], paragraph_start) for start, end, paragraph_start in iter_segments(text)]
+    assert flags == [
+        ("First paragraph ends here.", True),
+        ("Second one has no period", True),
+        ("Third line.", True),
+        ("Done.", False),
+    ]
+
+
+def test_paragraph_break_closes_a_half_full_chunk():
+    first = " ".join(sentence(word) for word in ("alpha", "beta", "gamma"))
+    second = " ".join(sentence(word) for word in ("delta", "epsilon"))
+    result = chunks(f"{first}\n\n{second}", max_tokens=50, overlap_tokens=0)
+    assert result == [first, second]
+
+
+def test_next_chunk_repeats_trailing_sentences_as_overlap():
+    sentences = [sentence(word) for word in ("alpha", "beta", "gamma", "delta", "epsilon")]
+    result = chunks(" ".join(sentences), max_tokens=30, overlap_tokens=10)
+    assert result[0] == " ".join(sentences[:3])
+    assert result[1].startswith(sentences[2])
+    assert result[-1].endswith(sentences[-1])
+
+
+def test_run_on_text_falls_back_to_whitespace_splits():
+    text = " ".join(f"word{i}" for i in range(300))
+    assert segments(text) == [text]
+
+    pieces = list(split_long_segment(text, 0, len(text), max_tokens=50))
+    assert all(end - start <= 200 for start, end in pieces)
+    assert " ".join(text[start:end] for start, end in pieces) == text
+
+    result = chunks(text, max_tokens=50, overlap_tokens=0)
+    assert len(result) == len(pieces)
+    assert " ".join(result) == text
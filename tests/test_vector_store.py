@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import VECTOR_FORMATS, LocalVectorStore
+
+
+@pytest.mark.parametrize("precision", list(VECTOR_FORMATS))
+def test_scores_follow_row_order(tmp_path, precision):
+    rng = np.random.default_rng(0)
+    dimension = 16
+    vectors = rng.standard_normal((12, dimension)).astype(np.float32)
+    store = LocalVectorStore(str(tmp_path), dimension=dimension, precision=precision)
+    store.upsert([(f"id{i}", vector) for i, vector in enumerate(vectors)])
+
+    query = store._unit(rng.standard_normal(dimension).astype(np.float32))
+    decoded = store._decode(np.arange(len(vectors)))
+    expected = decoded @ query / np.linalg.norm(decoded, axis=1)
+
+    # IVF candidates arrive in arbitrary order, sometimes starting at row 0
+    for rows in ([0, 2, 1, 3, 4], [0, 7, 2], [5, 0, 11, 3], list(range(12))):
+        rows = np.array(rows)
+        np.testing.assert_allclose(store._scores(query, rows), expected[rows], rtol=1e-4, atol=1e-5)
+
+
+def test_second_open_fails_until_closed(tmp_path):
+    first = LocalVectorStore(str(tmp_path), dimension=4)
+    first.upsert([("app_doc", np.ones(4, dtype=np.float32))])
+    with pytest.raises(RuntimeError, match="already open"):
+        LocalVectorStore(str(tmp_path), dimension=4)
+
+    first.close()
+    second = LocalVectorStore(str(tmp_path), dimension=4)
+    second.upsert([("cli_doc", np.arange(4, dtype=np.float32))])
+    second.close()
+    reopened = LocalVectorStore(str(tmp_path), dimension=4)
+    assert sorted(vector_id for page in reopened.list() for vector_id in page) == ["app_doc", "cli_doc"]
+    reopened.close()
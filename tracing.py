@@ -0,0 +1,136 @@
+import contextvars
+import functools
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_UNSAMPLED = object()
+
+
+class Span:
+    __slots__ = ("id", "parent_id", "trace_id", "name", "run_type", "start_time", "duration", "error")
+
+    def __init__(self, name, run_type, parent):
+        self.id = uuid.uuid4()
+        self.parent_id = parent.id if parent else None
+        self.trace_id = parent.trace_id if parent else self.id
+        self.name = name
+        self.run_type = run_type
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error = None
+
+
+class Tracer:
+    # Records spans into an in-process ring buffer. Sampling is decided once per trace
+    # (at the root span) and export runs on a background thread, so the traced code
+    # only pays for a couple of clock reads and a deque append.
+
+    def __init__(self, capacity=5000, sample_rate=1.0, exporter=None, export_interval=5.0):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.export_interval = export_interval
+        self.dropped_exports = 0
+        self._spans = deque(maxlen=capacity)
+        self._export_queue = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        if exporter:
+            threading.Thread(target=self._export_loop, daemon=True).start()
+
+    @contextmanager
+    def span(self, name, run_type="chain"):
+        parent = _current_span.get()
+        if parent is _UNSAMPLED or (parent is None and random.random() >= self.sample_rate):
+            token = _current_span.set(_UNSAMPLED)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+
+        span = Span(name, run_type, parent)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self._record(span)
+
+    def traced(self, name=None, run_type="chain"):
+        # The wrapped function is called exactly once; tracing never retries it
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, run_type):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, duration, run_type="chain"):
+        # For work that can't sit inside a `with` block, such as a consumed stream
+        parent = _current_span.get()
+        if parent is _UNSAMPLED or (parent is None and random.random() >= self.sample_rate):
+            return
+        span = Span(name, run_type, parent)
+        span.start_time -= duration
+        span.duration = duration
+        self._record(span)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+    def stage_stats(self):
+        with self._lock:
+            spans = list(self._spans)
+        durations = {}
+        errors = {}
+        for span in spans:
+            durations.setdefault(span.name, []).append(span.duration)
+            errors[span.name] = errors.get(span.name, 0) + (span.error is not None)
+        stats = []
+        for name, values in sorted(durations.items()):
+            p50, p95 = np.percentile(values, [50, 95])
+            stats.append({
+                "stage": name,
+                "count": len(values),
+                "errors": errors[name],
+                "p50_ms": round(p50 * 1000, 1),
+                "p95_ms": round(p95 * 1000, 1),
+            })
+        return stats
+
+    def _record(self, span):
+        with self._lock:
+            self._spans.append(span)
+            if self.exporter:
+                if len(self._export_queue) == self._export_queue.maxlen:
+                    self.dropped_exports += 1
+                self._export_queue.append(span)
+
+    def _export_loop(self):
+        while True:
+            time.sleep(self.export_interval)
+            with self._lock:
+                batch = list(self._export_queue)
+                self._export_queue.clear()
+            if not batch:
+                continue
+            try:
+                self.exporter(batch)
+            except Exception:
+                # Export is best effort; a failing backend must not affect requests
+                self.dropped_exports += len(batch)
@@ -0,0 +1,12 @@
+from docx import Document
+
+
+def extract_text_from_docx(file):
+    doc = Document(file)
+    text = "\n".join([para.text for para in doc.paragraphs])
+    return text
+
+
+def extract_metadata_from_text(text):
+    title = text.split('\n')[0] if text else "Untitled Video"
+    return {"title": title}